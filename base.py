@@ -1,28 +1,70 @@
 from tkinter import BooleanVar, messagebox, ttk
 from tkinter.constants import RAISED
-from PIL import Image, ImageTk
 import tkinter as tk
-import header, scoreboard, puzzle
+import logging
+import threading
 import sys
 
+# the modules needed for playing the game (header, scoreboard, puzzle, memory and PIL) are imported when first used
+# so the main menu can be shown as soon as possible
+
+logger = logging.getLogger(__name__)
+
+
 class Frame():
     """Creates the base frame. Takes the root window as a parameter"""
     def __init__(self, root):
-        bgImage = Image.open("app_images/bg.jpg")
-        bgImage = bgImage.resize((960,600), Image.ANTIALIAS)
-        # save the image in memory to be used later
-        self.bgImage = ImageTk.PhotoImage(bgImage)
+        # the background image is decoded on another thread, until it is ready the background is a plain colour
+        self.bgImage = None
+        self.bgDecoded = None
+        self.background = None
         self.frame = tk.Frame(root)
         self.frame.pack(fill='both', expand=True)
-        self.main_menu()
+        self.previewWindow = None
+        self.puzzle = None
+        self.menu = None
+        # number of games played since the app was started, used when reporting memory usage
+        self.gamesPlayed = 0
         self.root = root
+        self.main_menu()
+        self.loader = threading.Thread(target=self.load_in_background, daemon=True)
+        self.loader.start()
+        self.show_background()
+
+    def load_in_background(self):
+        """Decodes the background image and then prepares the first puzzle. Runs on a background thread"""
+        from PIL import Image
+        bgImage = Image.open("app_images/bg.jpg")
+        # jpegs can be decoded at a reduced scale which is much faster than decoding at full size and resizing
+        bgImage.draft('RGB', (960,600))
+        self.bgDecoded = bgImage.resize((960,600), Image.LANCZOS)
+        # importing the puzzle also imports the other modules it needs
+        import puzzle, puzzle_pieces
+        puzzle_pieces.warm_up()
+
+    def show_background(self):
+        """Checks every 50ms whether the background image has been decoded and then shows it"""
+        # tk images can only be created on the main thread so poll rather than creating it on the background thread
+        # the loader is checked before the image, otherwise it could decode the image and finish between the two checks
+        loaderRunning = self.loader.is_alive()
+        if self.bgDecoded is None:
+            # if the loader has finished without decoding the image it could not be loaded, so keep the plain background
+            if loaderRunning:
+                self.root.after(50, self.show_background)
+            return
+        from PIL import ImageTk
+        # save the image in memory to be used later
+        self.bgImage = ImageTk.PhotoImage(self.bgDecoded)
+        self.bgDecoded = None
+        if self.background is not None and self.background.winfo_exists():
+            self.background.config(image=self.bgImage)
         
     def main_menu(self):
         """Create the main menu buttons"""
         self.clear_frame()
         # set the background to image we have saved in memory
-        background = tk.Label(self.frame, image=self.bgImage)
-        background.place(x=0, y=0, relwidth=1, relheight=1)
+        self.background = tk.Label(self.frame, image=self.bgImage, background='#071B22')
+        self.background.place(x=0, y=0, relwidth=1, relheight=1)
         # create a frame in the centre of the window to contain the menu buttons
         menu = ttk.Frame(self.frame, padding=5)
         menu.place(relx=0.5, rely=0.5, anchor='center')
@@ -45,22 +87,38 @@ class Frame():
         scoreButton.pack(fill='x', pady=3)
 
     def clear_frame(self):
-        """Remove all objects from frame"""
+        """Remove all objects from frame and release the images used by the puzzle"""
         for object in self.frame.winfo_children():
             object.destroy()
+        # the buttons using the puzzle images have been destroyed so the images can be deleted
+        if self.puzzle is not None:
+            self.puzzle.release()
+            self.puzzle = None
+        self.previewWindow = None
+
+    def remove_menu(self):
+        """Removes the top menu bar from the window and destroys it"""
+        if self.menu is not None:
+            self.root.config(menu=0)
+            self.menu.destroy()
+            self.menu = None
     
     def view_scores(self):
         """Display player scores. Takes up full window"""
+        import scoreboard
         self.clear_frame()
         scores = scoreboard.Full_scoreboard(self)
 
     def play_game(self, numberOfTiles):
         """Creates the puzzle frame as well as a header and scoreboard frame. 
         Accepts a number of tiles to create the puzzle with"""
+        import header, scoreboard, puzzle, memory
         self.clear_frame()
         self.numberOfTiles = numberOfTiles
-        # create the top menu bar
+        # create the top menu bar, destroying the one from the previous game
+        self.remove_menu()
         menu = tk.Menu(self.root)
+        self.menu = menu
         self.root.config(menu=menu)
         fileMenu = tk.Menu(menu, tearoff=False)
         helpMenu = tk.Menu(menu, tearoff=False)
@@ -83,10 +141,21 @@ class Frame():
         self.scoreboard = scoreboard.Scoreboard(self)
         self.header = header.Frame(self)
         self.puzzle = puzzle.Board(self, tiles=numberOfTiles)
+        self.gamesPlayed += 1
+        # memory use is only read when it will be logged, run main.py with --verbose to see it
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Game %d (%d tiles): memory in use %s", self.gamesPlayed, numberOfTiles, memory.format_rss(memory.get_rss()))
     
-    def move_completed(self):
+    def move_completed(self, numberOfMoves=1):
         """Increments the number of moves in the header"""
-        self.header.increment_moveCounter()
+        self.header.increment_moveCounter(numberOfMoves)
+        # the preview only needs redrawing if it is open
+        if self.preview_is_open():
+            self.previewWindow.draw_overlays()
+
+    def progress_changed(self, piecesInPlace, numberOfPieces, distance):
+        """Updates the progress shown in the header"""
+        self.header.update_progress(piecesInPlace, numberOfPieces, distance)
 
     def puzzle_completed(self, noHints):
         """Stops the timer and retrieves the score data from the header. Presents user with pop up to capture name"""
@@ -97,8 +166,8 @@ class Frame():
         # get the centre of the screen
         xCentre = int(self.root.winfo_screenwidth() / 2)
         yCentre = int(self.root.winfo_screenheight() / 2)
-        # create an input window for user to enter name 
-        Input_window(self.frame, score, self.numberOfTiles, self.save_score, xCentre, yCentre, noHints)
+        # create an input window for user to enter name, the recorded game is saved with the score so it can be verified
+        Input_window(self.frame, score, self.numberOfTiles, self.save_score, xCentre, yCentre, noHints, self.puzzle.recorded_game)
 
     def save_score(self, scoreData):
         """Passes the score data to the scoreboard module to be saved to file"""
@@ -120,9 +189,17 @@ class Frame():
             self.header.stop_timer()
             self.play_game(numberOfTiles)
 
+    def preview_is_open(self):
+        """Returns True if the preview window exists and belongs to the current puzzle"""
+        return self.previewWindow is not None and self.previewWindow.window.winfo_exists()
+
     def view_image(self):
-        """Opens the image currently being used in the puzzle in a seperate window"""
-        self.puzzle.img.whole_image.show()
+        """Opens a preview of the image currently being used in the puzzle in a seperate window"""
+        # if the preview is already open bring it to the front rather than opening another
+        if self.preview_is_open():
+            self.previewWindow.window.lift()
+        else:
+            self.previewWindow = Preview_window(self.frame, self.puzzle)
 
     def end_game(self):
         """Clear puzzle, header and scoreboard and display main menu. Asks for user confirmation"""
@@ -130,7 +207,7 @@ class Frame():
         if answer == True:    
             self.clear_frame()
             self.header.stop_timer()
-            self.root.config(menu=0)
+            self.remove_menu()
             self.main_menu()
     
     def restart(self):
@@ -150,14 +227,59 @@ class Frame():
                 sys.exit('Program terminated')
 
 
+class Preview_window():
+    """Pop up window that shows the whole image being used in the puzzle with optional overlays"""
+    def __init__(self, root, puzzleBoard):
+        self.puzzleBoard = puzzleBoard
+        self.window = tk.Toplevel(root)
+        self.window.title("Image")
+        # no minimise and maximise buttons
+        self.window.transient(root)
+        self.window.resizable(False,False)
+        # the preview photo image is created once per puzzle and reused every time the window is opened
+        image = self.puzzleBoard.img.preview
+        self.size = image.width()
+        self.canvas = tk.Canvas(self.window, width=self.size, height=self.size, highlightthickness=0)
+        self.canvas.create_image(0, 0, image=image, anchor='nw')
+        self.canvas.grid(column=0, row=0, columnspan=2)
+        self.showGridVar = BooleanVar()
+        self.showGridVar.set(False)
+        gridCheck = tk.Checkbutton(self.window, text="Show grid", variable=self.showGridVar, command=self.draw_overlays)
+        gridCheck.grid(column=0, row=1, padx=8, pady=5, sticky='w')
+        self.showPlacedVar = BooleanVar()
+        self.showPlacedVar.set(False)
+        placedCheck = tk.Checkbutton(self.window, text="Show tiles in place", variable=self.showPlacedVar, command=self.draw_overlays)
+        placedCheck.grid(column=1, row=1, padx=8, pady=5, sticky='e')
+
+    def draw_overlays(self):
+        """Redraws the grid and the tiles that are in the correct place on top of the image"""
+        # overlays are tagged so they can be removed without redrawing the image
+        self.canvas.delete('overlay')
+        sqrtOfTiles = self.puzzleBoard.sqrtOfTiles
+        tileSize = self.size / sqrtOfTiles
+        if self.showPlacedVar.get():
+            for tile in self.puzzleBoard.tiles:
+                if tile.number == tile.puzzlePiece.id and not tile.puzzlePiece.isBlank:
+                    left = tile.column * tileSize
+                    top = tile.row * tileSize
+                    self.canvas.create_rectangle(left, top, left + tileSize, top + tileSize, 
+                        fill='#5FC7C7', stipple='gray25', outline='#5FC7C7', width=2, tags='overlay')
+        if self.showGridVar.get():
+            for i in range(1, sqrtOfTiles):
+                position = i * tileSize
+                self.canvas.create_line(position, 0, position, self.size, fill='#FFFFFF', tags='overlay')
+                self.canvas.create_line(0, position, self.size, position, fill='#FFFFFF', tags='overlay')
+
+
 class Input_window():
     """Pop up window that prompts user for their name"""
-    def __init__(self, root, score, numberOfTiles, submitMethod, xCoord, yCoord, noHints):
+    def __init__(self, root, score, numberOfTiles, submitMethod, xCoord, yCoord, noHints, recordedGame):
         # this function will be called on press of submit
         self.submitMethod = submitMethod
         self.score = score
         self.numberOfTiles = numberOfTiles
         self.noHints = noHints
+        self.recordedGame = recordedGame
         self.maxNameLength = 15
         self.window = tk.Toplevel(root)
         # set the geometry of the window "width x height + x-Coordinate + y-Coordinate"
@@ -198,7 +320,8 @@ class Input_window():
 
     def submit_data(self):
         """Passes list containing score data back to the base frame object. 
-        [moves (int), time sec (int), time "HH:MM:SS"(str), name (str), num of tiles (int)]"""
+        [moves (int), time sec (int), time "HH:MM:SS"(str), name (str), num of tiles (int), no hints (bool),
+        start position (str), moves played (str), seed (int)]"""
         name = self.userInput.get()
         if len(name) == 0:
             messagebox.showwarning('Invalid name', 'Name cannot be blank')
@@ -207,5 +330,6 @@ class Input_window():
             data.append(name)
             data.append(self.numberOfTiles)
             data.append(self.noHints)
+            data.extend(self.recordedGame)
             self.submitMethod(data)
             self.window.destroy()
\ No newline at end of file
@@ -0,0 +1,36 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+
+def measure_startup():
+    """Starts the game in benchmark mode and returns the times in milliseconds from launching the process
+    until the main menu is drawn and until the background image is shown"""
+    launchTime = time.perf_counter()
+    process = subprocess.Popen([sys.executable, 'main.py', '--startup-benchmark'], stdout=subprocess.PIPE, text=True)
+    times = {}
+    # each line is timed as it arrives so the times include starting the python interpreter
+    for line in process.stdout:
+        name = line.split(':')[0]
+        times[name] = (time.perf_counter() - launchTime) * 1000
+    if process.wait() != 0:
+        sys.exit("The game exited with an error")
+    return times['first paint'], times['background shown']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure how long the game takes to show the main menu")
+    parser.add_argument('--runs', type=int, default=10, help="number of times to start the game (default: 10)")
+    args = parser.parse_args()
+    firstPaint = []
+    background = []
+    for i in range(args.runs):
+        paintTime, backgroundTime = measure_startup()
+        firstPaint.append(paintTime)
+        background.append(backgroundTime)
+    print("Time to first paint: median {0:.0f} ms, min {1:.0f} ms, max {2:.0f} ms".format(
+        statistics.median(firstPaint), min(firstPaint), max(firstPaint)))
+    print("Time to background shown: median {0:.0f} ms, min {1:.0f} ms, max {2:.0f} ms".format(
+        statistics.median(background), min(background), max(background)))
@@ -22,6 +22,21 @@ class Frame():
         moveDisplay.grid(column=1, row=0, sticky="ew")
         moveLabel = ttk.Label(moveDisplayFrame, text="Moves:", anchor='e', font=("verdana", 10))
         moveLabel.grid(column=0, row=0, sticky="ew")
+        # create the frame that contains the number of pieces in place and how far the pieces are from their places
+        progressFrame = ttk.Frame(frame, style='Header.TFrame')
+        progressFrame.pack(side="left", fill="x", expand=True, pady=3)
+        self.progress = tk.StringVar()
+        progressDisplay = ttk.Label(progressFrame, textvariable=self.progress, font=("verdana", 12))
+        progressDisplay.config(width=5, anchor='w', relief=SUNKEN, borderwidth=1, padding=1)
+        progressDisplay.grid(column=1, row=0, sticky="ew")
+        progressLabel = ttk.Label(progressFrame, text="Placed:", anchor='e', font=("verdana", 10))
+        progressLabel.grid(column=0, row=0, sticky="ew")
+        self.distance = tk.StringVar()
+        distanceDisplay = ttk.Label(progressFrame, textvariable=self.distance, font=("verdana", 12))
+        distanceDisplay.config(width=4, anchor='w', relief=SUNKEN, borderwidth=1, padding=1)
+        distanceDisplay.grid(column=3, row=0, sticky="ew")
+        distanceLabel = ttk.Label(progressFrame, text="Distance:", anchor='e', font=("verdana", 10))
+        distanceLabel.grid(column=2, row=0, sticky="ew", padx=(5,0))
         # create the frame that contains the timer display
         time = ttk.Frame(frame, style='Header.TFrame')
         time.pack(side="right", fill="x", expand=True, pady=3)
@@ -62,11 +77,16 @@ class Frame():
         display = "{0}:{1}:{2}".format(hours,minutes,seconds)
         self.displayTime.set(display)
     
-    def increment_moveCounter(self):
-        """Increments the move counter by one every time this method is called""" 
-        self.moveCounter += 1
+    def increment_moveCounter(self, numberOfMoves=1):
+        """Increments the move counter by the number of moves made, one unless several tiles were slid at once""" 
+        self.moveCounter += numberOfMoves
         self.moves.set(f"{self.moveCounter}")
 
+    def update_progress(self, piecesInPlace, numberOfPieces, distance):
+        """Updates the number of pieces in their correct place and their total distance (rows plus columns) from their correct places"""
+        self.progress.set(f"{piecesInPlace}/{numberOfPieces}")
+        self.distance.set(f"{distance}")
+
     def stop_timer(self):
         """Sets stopTimer to True which prevents timer from being incremented. Also cancels the timer thread"""
         self.timer.cancel()
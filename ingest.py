@@ -0,0 +1,147 @@
+import argparse
+import hashlib
+import os
+import shelve
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image as Img
+import puzzle_pieces
+
+# working copies are saved in the images folder so the game can pick them at random
+IMAGES_FOLDER = "images"
+THUMBNAILS_FOLDER = "thumbnails"
+INVALID_FOLDER = "invalidImages"
+# metadata for every image that has been ingested - also used to resume an interrupted run
+MANIFEST = "ingest.dat"
+# the largest side of a working copy, the board is never drawn bigger than this
+WORKING_SIZE = 1600
+THUMBNAIL_SIZE = 128
+
+
+def find_images(folder):
+    """Walks the folder tree and yields the absolute path of every file with a valid extension"""
+    # skip the folders the ingestion writes to or working copies would be ingested again
+    outputFolders = [os.path.abspath(directory) for directory in (IMAGES_FOLDER, THUMBNAILS_FOLDER, INVALID_FOLDER)]
+    for directory, subFolders, files in os.walk(folder):
+        if os.path.abspath(directory) in outputFolders:
+            subFolders.clear()
+            continue
+        # sort so runs over the same tree always process files in the same order
+        subFolders.sort()
+        for file in sorted(files):
+            if file.lower().endswith(puzzle_pieces.VALID_EXTENSIONS):
+                yield os.path.abspath(os.path.join(directory, file))
+
+
+def output_name(path, extension=".jpg"):
+    """Returns a unique file name for a copy of the image at the given path, by default the jpeg working copy"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    # images in different folders may share a name so add a short hash of the full path
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+    return "{0}_{1}{2}".format(stem, digest, extension)
+
+
+def quarantine(path, reason):
+    """Copies an invalid image to the invalid images folder and returns the metadata recording why"""
+    # the original is left where it is as it belongs to the library being imported, the manifest stops it being checked again.
+    # The image is copied rather than converted so it keeps its own extension
+    destination = os.path.join(INVALID_FOLDER, output_name(path, os.path.splitext(path)[1]))
+    try:
+        shutil.copy2(path, destination)
+    except OSError as error:
+        reason = "{0} (could not be copied: {1})".format(reason, error)
+        destination = None
+    return {'status': 'invalid', 'reason': reason, 'quarantined': destination}
+
+
+def process_image(job):
+    """Verifies, normalises and creates a thumbnail for a single image. Runs in a worker process.
+    Takes a tuple of (path, file size, modified time) and returns a tuple of (path, metadata)"""
+    path, fileSize, modified = job
+    metadata = {'size': fileSize, 'mtime': modified}
+    # verify checks the file is not truncated or corrupt without decoding it, the image must be opened again afterwards
+    try:
+        with Img.open(path) as img:
+            img.verify()
+    except Exception as error:
+        metadata.update(quarantine(path, "could not be decoded: {0}".format(error)))
+        return path, metadata
+    try:
+        with Img.open(path) as img:
+            width, height = img.size
+            imageFormat = img.format
+            isValidWidth = width < puzzle_pieces.MAX_IMAGE_SIZE and width > puzzle_pieces.MIN_IMAGE_SIZE
+            isValidHeight = height < puzzle_pieces.MAX_IMAGE_SIZE and height > puzzle_pieces.MIN_IMAGE_SIZE
+            if not (isValidWidth and isValidHeight):
+                metadata.update(quarantine(path, "size {0}x{1} is outside the limits".format(width, height)))
+                return path, metadata
+            # jpegs can be decoded at a reduced scale which is much faster than decoding at full size and resizing
+            img.draft('RGB', (WORKING_SIZE, WORKING_SIZE))
+            square = puzzle_pieces.Image.crop_image_square(img.convert('RGB'))
+    except Exception as error:
+        metadata.update(quarantine(path, "could not be decoded: {0}".format(error)))
+        return path, metadata
+    # never scale an image up, only down to the working size
+    if square.width > WORKING_SIZE:
+        square = square.resize((WORKING_SIZE, WORKING_SIZE), Img.LANCZOS)
+    name = output_name(path)
+    output = os.path.join(IMAGES_FOLDER, name)
+    thumbnail = os.path.join(THUMBNAILS_FOLDER, name)
+    square.save(output, quality=90)
+    square.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Img.LANCZOS)
+    square.save(thumbnail, quality=85)
+    metadata.update({
+        'status': 'valid',
+        'format': imageFormat,
+        'width': width,
+        'height': height,
+        'output': output,
+        'thumbnail': thumbnail
+    })
+    return path, metadata
+
+
+def is_ingested(manifest, path, fileSize, modified):
+    """Returns True if the image has already been ingested and has not changed since"""
+    metadata = manifest.get(path)
+    return metadata is not None and metadata['size'] == fileSize and metadata['mtime'] == modified
+
+
+def ingest(folder, workers=None):
+    """Ingests every image in the folder tree using a pool of processes. Images that were ingested
+    by a previous run are skipped. Returns the number of valid and invalid images processed"""
+    for directory in (IMAGES_FOLDER, THUMBNAILS_FOLDER, INVALID_FOLDER):
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+    valid = 0
+    invalid = 0
+    manifest = shelve.open(MANIFEST)
+    try:
+        jobs = []
+        for path in find_images(folder):
+            status = os.stat(path)
+            if not is_ingested(manifest, path, status.st_size, status.st_mtime):
+                jobs.append((path, status.st_size, status.st_mtime))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # large chunks keep the overhead of passing jobs between processes low
+            chunkSize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 8))
+            for path, metadata in pool.map(process_image, jobs, chunksize=chunkSize):
+                # results are written as soon as they arrive so an interrupted run can be resumed
+                manifest[path] = metadata
+                if metadata['status'] == 'valid':
+                    valid += 1
+                else:
+                    invalid += 1
+                    print("Invalid image {0}: {1}".format(path, metadata['reason']))
+    finally:
+        manifest.close()
+    return valid, invalid
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import a folder of images to be used in the puzzle")
+    parser.add_argument('folder', help="folder to search for images, including sub folders")
+    parser.add_argument('--workers', type=int, default=None, help="number of processes to use (default: number of CPUs)")
+    args = parser.parse_args()
+    valid, invalid = ingest(args.folder, args.workers)
+    print("Ingested {0} images, {1} invalid".format(valid, invalid))
@@ -1,23 +1,46 @@
+import time
+# time from here to the window being drawn is reported when benchmarking startup
+startTime = time.perf_counter()
 import tkinter as tk
+import ctypes
+import logging
+import sys
 import style
 import base
 
+# --verbose reports diagnostics such as the memory in use after each game is started
+if '--verbose' in sys.argv:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s: %(message)s")
+
+# on windows tell the system the app handles high DPI displays itself, otherwise the whole window is stretched and blurry
+try:
+    ctypes.windll.shcore.SetProcessDpiAwareness(1)
+except (AttributeError, OSError):
+    pass
+
 # create the window
 root = tk.Tk()
 
+# the window size is given for a standard 96 DPI display so scale it for high DPI displays
+scale = root.winfo_fpixels('1i') / 96
+width = int(750 * scale)
+height = int(550 * scale)
 # get the centre of the screen
 xCentre = int(root.winfo_screenwidth() / 2)
 yCentre = int(root.winfo_screenheight() / 2)
 # set window size and launch app in centre of screen
-root.geometry("750x550+{0}+{1}".format(xCentre - 350, yCentre - 300))
+root.geometry("{0}x{1}+{2}+{3}".format(width, height, xCentre - width // 2, yCentre - height // 2))
 
-# resizing the window may cause issues so set both axis to False
-root.resizable(False, False)
+# the window can be made bigger but any smaller and the scoreboard will not fit
+root.minsize(width, height)
 
 # set title
 root.title("Sliding Puzzle Game")
-# set icon
-root.iconbitmap('app_images/smart_cat.ico')
+# set icon - .ico files are only supported on windows
+try:
+    root.iconbitmap('app_images/smart_cat.ico')
+except tk.TclError:
+    pass
 
 # create the base frame in this window
 baseFrame = base.Frame(root)
@@ -29,4 +52,16 @@ root.protocol("WM_DELETE_WINDOW", baseFrame.exit)
 # configure the style of all widgets
 style.configuration()
 
-root.mainloop()
+# when benchmarking startup, draw the window, report how long it took and exit rather than waiting for the user
+if '--startup-benchmark' in sys.argv:
+    root.update()
+    print("first paint: {0:.1f} ms".format((time.perf_counter() - startTime) * 1000), flush=True)
+    # keep processing events until the background image has been shown
+    while baseFrame.bgImage is None and baseFrame.loader.is_alive():
+        root.update()
+        time.sleep(0.005)
+    root.update()
+    print("background shown: {0:.1f} ms".format((time.perf_counter() - startTime) * 1000), flush=True)
+    root.destroy()
+else:
+    root.mainloop()
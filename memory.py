@@ -0,0 +1,44 @@
+import ctypes
+import os
+import sys
+
+
+class Process_memory_counters(ctypes.Structure):
+    """PROCESS_MEMORY_COUNTERS structure filled in by GetProcessMemoryInfo on windows"""
+    _fields_ = [
+        ('cb', ctypes.c_ulong),
+        ('PageFaultCount', ctypes.c_ulong),
+        ('PeakWorkingSetSize', ctypes.c_size_t),
+        ('WorkingSetSize', ctypes.c_size_t),
+        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+        ('PagefileUsage', ctypes.c_size_t),
+        ('PeakPagefileUsage', ctypes.c_size_t)
+    ]
+
+
+def get_rss():
+    """Returns the resident set size (memory currently in use) of this process in bytes, or None if it cannot be read"""
+    if sys.platform == 'win32':
+        counters = Process_memory_counters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            # the working set is what windows calls the resident set size
+            return counters.WorkingSetSize
+        return None
+    # on linux the second value in statm is the number of resident pages
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def format_rss(rss):
+    """Returns the resident set size as a string in megabytes"""
+    if rss is None:
+        return "unknown"
+    return "{0:.1f} MB".format(rss / 1024 ** 2)
@@ -2,6 +2,16 @@ import tkinter as tk
 from tkinter import ttk
 import puzzle_pieces
 
+# milliseconds to wait after the last resize event before the pieces are cut to the new size
+RESIZE_DELAY = 200
+# for each key, the row and column of the tile that slides into the empty tile relative to the empty tile
+# e.g. pressing left slides the tile to the right of the empty tile to the left
+KEY_DIRECTIONS = {
+    'left': (0, 1), 'a': (0, 1),
+    'right': (0, -1), 'd': (0, -1),
+    'up': (1, 0), 'w': (1, 0),
+    'down': (-1, 0), 's': (-1, 0)
+}
 
 class Board():
     """Creates a frame that contains the game puzzle"""
@@ -18,37 +28,21 @@ class Board():
         return tilePositions
     
     @staticmethod
-    def pieces_match_tiles(tiles):
-        """Returns True if all puzzle pieces are on correct tiles"""
-        # create a list of boolean values for whether puzzle pieces match the tile they are on
-        matchingTiles = [tile.number == tile.puzzlePiece.id for tile in tiles]
-        # if there are no False values in list then all pieces are on correct tiles and True is returned
-        return not False in matchingTiles
+    def distance_from_home(piece, tile, sqrtOfTiles):
+        """Returns the number of rows plus the number of columns between the tile and the tile the piece belongs on"""
+        homeRow, homeColumn = divmod(piece.id, sqrtOfTiles)
+        return abs(tile.row - homeRow) + abs(tile.column - homeColumn)
 
     @staticmethod
     def get_active_tiles(emptyTile, numberOfTiles, sqrtOfTiles):
-        """Returns a list of tile positions that neighbour the given tile position"""
-        activeTiles = []
-        # if on right edge include tile to left
-        if emptyTile % sqrtOfTiles == sqrtOfTiles - 1:
-            activeTiles.append(emptyTile - 1)
-        # else if on left edge include tile to right
-        elif emptyTile % sqrtOfTiles == 0:
-            activeTiles.append(emptyTile + 1)
-        # else not on right or left edge include tiles on both sides
-        else:
-            activeTiles.append(emptyTile - 1)
-            activeTiles.append(emptyTile + 1)
-        # if on top edge include tile below 
-        if emptyTile < sqrtOfTiles:
-            activeTiles.append(emptyTile + sqrtOfTiles)
-        # else if on bottom edge include tile above
-        elif emptyTile >= numberOfTiles - sqrtOfTiles:
-            activeTiles.append(emptyTile - sqrtOfTiles)
-        # else not on top or bottom edge include tiles above and below
-        else:
-            activeTiles.append(emptyTile + sqrtOfTiles)
-            activeTiles.append(emptyTile - sqrtOfTiles)
+        """Returns a list of tile positions in the same row or column as the given tile position.
+        Selecting any of them slides every piece between it and the given tile"""
+        row = emptyTile // sqrtOfTiles
+        column = emptyTile % sqrtOfTiles
+        # every other tile in the row
+        activeTiles = [row * sqrtOfTiles + i for i in range(sqrtOfTiles) if i != column]
+        # every other tile in the column
+        activeTiles += [i * sqrtOfTiles + column for i in range(sqrtOfTiles) if i != row]
         return activeTiles
 
     def __init__(self, base, tiles):
@@ -58,36 +52,110 @@ class Board():
         self.noHints = True
         self.frame = ttk.Frame(self.base.frame)
         self.frame.pack(fill="both", expand=True)
+        # the tiles are kept in a square frame in the centre of the board so they stay together whatever shape the window is
+        self.tileFrame = ttk.Frame(self.frame)
          # get square root of the number of tiles
         sqrtOfTiles = self.numberOfTiles ** 0.5
         self.sqrtOfTiles = int(sqrtOfTiles)
-        # configure grid
+        # configure grid, every row and column is kept the same size
         for i in range(self.sqrtOfTiles):
-            self.frame.columnconfigure(i, weight=1)
-            self.frame.rowconfigure(i, weight=1)     
+            self.tileFrame.columnconfigure(i, weight=1, uniform='tiles')
+            self.tileFrame.rowconfigure(i, weight=1, uniform='tiles')
         # get rows and columns for each tile position
         tilePositions = Board.get_tile_positions(self.sqrtOfTiles)
         # list comprehension to create tiles by passing self as reference to puzzle board, value as the tuple containing xy position and key as the tile number 
         self.tiles = [Tile(self, value, key) for key, value in tilePositions.items()]
         # before we can get the board width, idle tasks need to be updated or winfo_width will return 0
         self.frame.update_idletasks()
-        # boardwidth is needed to crop the images to correct size on puzzle pieces
-        boardWidth = self.frame.winfo_width()
+        # boardwidth is needed to crop the images to correct size on puzzle pieces, the board is square so use the shortest side
+        boardWidth = min(self.frame.winfo_width(), self.frame.winfo_height())
+        self.pieceWidth = boardWidth // self.sqrtOfTiles
+        self.place_tile_frame(boardWidth)
         # get the puzzle pieces and get a copy of the whole image that is used in the puzzle
-        self.img, puzzlePieces = puzzle_pieces.get(self.numberOfTiles, boardWidth)
+        # the seed is saved with the score so the start position can be rebuilt when the score is verified
+        self.seed = puzzle_pieces.new_seed()
+        self.img, puzzlePieces = puzzle_pieces.get(self.numberOfTiles, boardWidth, self.seed)
         # assign the puzzle pieces to their initial tiles
         for i, tile in enumerate(self.tiles):
             tile.assign_puzzle_piece(puzzlePieces[i])
+        # the game is recorded so it can be replayed to verify the score - the start position and a letter for every move
+        self.startPosition = " ".join(str(piece.id) for piece in puzzlePieces)
+        self.movesPlayed = []
+        # the letter recorded for the direction pieces slide, keyed by the step from the empty tile to the tile the piece came from
+        # e.g. a piece coming from the tile to the right of the empty tile slides left
+        self.moveLetters = {1: 'L', -1: 'R', self.sqrtOfTiles: 'U', -self.sqrtOfTiles: 'D'}
         # configure which tiles should be disabled and which active
         self.configure_tiles()
+        # count the pieces on their correct tiles and their total distance from their correct tiles
+        # these are kept up to date as pieces move so they never need counting again
+        pieces = [tile for tile in self.tiles if not tile.puzzlePiece.isBlank]
+        self.piecesInPlace = sum(tile.number == tile.puzzlePiece.id for tile in pieces)
+        self.distance = sum(Board.distance_from_home(tile.puzzlePiece, tile, self.sqrtOfTiles) for tile in pieces)
+        self.base.progress_changed(self.piecesInPlace, self.numberOfTiles - 1, self.distance)
+        # the fragments are not needed once the pieces have been cut
+        self.img.release_fragments()
+        # the pieces are recut when the window is resized, but only once the resizing has stopped
+        self.resizeJob = None
+        self.frame.bind('<Configure>', self.board_resized)
+        # arrow keys and WASD slide the tiles next to the empty tile
+        self.keyBinding = self.base.root.bind('<KeyPress>', self.key_pressed)
+
+    def key_pressed(self, event):
+        """Event triggered on key press. Slides the tile next to the empty tile in the direction of the key, if there is one"""
+        direction = KEY_DIRECTIONS.get(event.keysym.lower())
+        if direction is None:
+            return
+        row = self.emptyTile.row + direction[0]
+        column = self.emptyTile.column + direction[1]
+        # nothing happens if the empty tile is on the edge the tile would come from
+        if 0 <= row < self.sqrtOfTiles and 0 <= column < self.sqrtOfTiles:
+            self.tiles[row * self.sqrtOfTiles + column].tile_selected()
+
+    def place_tile_frame(self, boardWidth):
+        """Centres the frame holding the tiles on the board as a square that fits a whole number of pieces of the given board width"""
+        tileFrameWidth = boardWidth // self.sqrtOfTiles * self.sqrtOfTiles
+        self.tileFrame.place(relx=0.5, rely=0.5, anchor='center', width=tileFrameWidth, height=tileFrameWidth)
+
+    def board_resized(self, event):
+        """Event triggered whenever the board changes size. Keeps the tiles square straight away and schedules the pieces
+        to be resized, cancelling any resize already scheduled"""
+        boardWidth = min(event.width, event.height)
+        self.place_tile_frame(boardWidth)
+        if self.resizeJob is not None:
+            self.frame.after_cancel(self.resizeJob)
+        self.resizeJob = self.frame.after(RESIZE_DELAY, self.resize_pieces, boardWidth)
+
+    def resize_pieces(self, boardWidth):
+        """Cuts all puzzle pieces to fit the given board width and updates the tiles"""
+        self.resizeJob = None
+        pieceWidth = boardWidth // self.sqrtOfTiles
+        # nothing to do if the pieces are already the right size
+        if pieceWidth == self.pieceWidth or pieceWidth < 1:
+            return
+        self.pieceWidth = pieceWidth
+        for tile in self.tiles:
+            tile.puzzlePiece.set_size(self.img, pieceWidth)
+            tile.configure_image()
+        self.img.release_fragments()
+
+    def release(self):
+        """Cancels any scheduled resize, removes the key binding and deletes the Tk images used by the puzzle. Called when the board is cleared"""
+        # passing the binding id also deletes the Tcl command that was created for it
+        self.base.root.unbind('<KeyPress>', self.keyBinding)
+        if self.resizeJob is not None:
+            self.frame.after_cancel(self.resizeJob)
+            self.resizeJob = None
+        for tile in self.tiles:
+            tile.puzzlePiece.release(self.frame.tk)
+        self.img.release(self.frame.tk)
 
     def configure_tiles(self):
-        """Finds the empty tile and configures other tiles so only the neighbouring ones are active"""
+        """Finds the empty tile and configures other tiles so only the ones in the same row or column are active"""
         # get the empty tile 
         self.emptyTile = self.get_empty_tile()
-        # gets a list of tiles that neighbour the empty tile
+        # gets a list of tiles in the same row or column as the empty tile
         self.activeTiles = Board.get_active_tiles(self.emptyTile.number, self.numberOfTiles, self.sqrtOfTiles)
-        # set the tiles neighbouring the empty tile to active
+        # set the tiles in line with the empty tile to active
         self.set_active_tiles()
 
     def get_empty_tile(self):
@@ -97,7 +165,7 @@ class Board():
                 return tile
 
     def set_active_tiles(self):
-        """Sets the tiles that neighbour the empty tile to active and disables the rest"""
+        """Sets the tiles in line with the empty tile to active and disables the rest"""
         for tile in self.tiles:
             if tile.number in self.activeTiles:
                 tile.set_to_active()
@@ -105,19 +173,46 @@ class Board():
                 tile.set_to_disabled()
 
     def swap_pieces(self, selectedTile):
-        """Moves the puzzle piece from the selected tile to the empty tile"""
-        # the piece from the selected tile 
-        selectedPiece = selectedTile.puzzlePiece
+        """Slides the puzzle piece on the selected tile, and every piece between it and the empty tile, one place towards the empty tile.
+        However many pieces move the board is updated and checked for a win once, and each piece moved counts as a move"""
+        # the step from one tile to the next going from the empty tile towards the selected tile - along the row or down the column
+        if selectedTile.row == self.emptyTile.row:
+            step = 1 if selectedTile.number > self.emptyTile.number else -1
+        else:
+            step = self.sqrtOfTiles if selectedTile.number > self.emptyTile.number else -self.sqrtOfTiles
         # the blank piece from the empty tile
         blankPiece = self.emptyTile.puzzlePiece
-        # assign the blank puzzle piece to the current selected tile
+        # move each piece into the tile before it, starting with the piece next to the empty tile
+        numberOfMoves = 0
+        for tileNumber in range(self.emptyTile.number, selectedTile.number, step):
+            self.move_piece(self.tiles[tileNumber + step], self.tiles[tileNumber])
+            numberOfMoves += 1
+        # every piece in a slide moves in the same direction
+        self.movesPlayed.append(self.moveLetters[step] * numberOfMoves)
+        # assign the blank puzzle piece to the selected tile
         selectedTile.assign_puzzle_piece(blankPiece)
-        # assign the selected piece to the current empty tile
-        self.emptyTile.assign_puzzle_piece(selectedPiece)
-        self.base.move_completed()
+        self.base.move_completed(numberOfMoves)
+        self.base.progress_changed(self.piecesInPlace, self.numberOfTiles - 1, self.distance)
         self.configure_tiles()
         self.check_for_win()
+
+    def move_piece(self, fromTile, toTile):
+        """Moves the piece on one tile to another and updates the number of pieces in place and their distance from their correct tiles"""
+        piece = fromTile.puzzlePiece
+        # only the piece that moved can change the counts so there is no need to check every tile
+        if piece.id == fromTile.number:
+            self.piecesInPlace -= 1
+        elif piece.id == toTile.number:
+            self.piecesInPlace += 1
+        self.distance += Board.distance_from_home(piece, toTile, self.sqrtOfTiles) - Board.distance_from_home(piece, fromTile, self.sqrtOfTiles)
+        toTile.assign_puzzle_piece(piece)
     
+    @property
+    def recorded_game(self):
+        """Returns the start position (piece ids in tile order separated by spaces), a string with a letter for every move
+        and the seed the start position was shuffled from"""
+        return self.startPosition, "".join(self.movesPlayed), self.seed
+
     def toggle_show_numbers(self, showNumbers):
         self.showNumbers = showNumbers
         self.noHints = False
@@ -125,8 +220,8 @@ class Board():
             tile.configure_image()
 
     def check_for_win(self):
-        """Compares all tiles to their position on the board, if all in correct position puzzle is completed"""
-        if Board.pieces_match_tiles(self.tiles):
+        """If every piece is in its correct position the puzzle is completed. The blank piece must then be in place too"""
+        if self.piecesInPlace == self.numberOfTiles - 1:
             for tile in self.tiles:
                 tile.set_to_disabled()
             self.base.puzzle_completed(self.noHints)
@@ -140,21 +235,24 @@ class Tile():
         self.puzzlePiece = None   
         self.row = tilePosition[0]
         self.column = tilePosition[1]
+        self.btn = None
+        self.active = False
         
     def assign_puzzle_piece(self, piece):
-        """When a puzzle piece is assigned a button is created in this tile position"""
+        """When a puzzle piece is assigned the button in this tile position is shown, or hidden for the blank piece"""
         self.puzzlePiece = piece
         if not self.puzzlePiece.isBlank:
-            # a button is used to represent the tile
-            self.btn = tk.Button(self.puzzleBoard.frame)
+            # the button is created the first time a piece is assigned and reused after that
+            if self.btn is None:
+                # a button is used to represent the tile
+                self.btn = tk.Button(self.puzzleBoard.tileFrame, command=self.tile_selected)
+                self.btn.grid(column=self.column, row=self.row, sticky='nsew')
+            else:
+                # grid with no options restores the position the button had before it was removed
+                self.btn.grid()
             self.configure_image()
-            self.btn.grid(column=self.column, row=self.row, sticky='nsew')
-        else:
-            # when board is created blank tile doesn't exist and will throw an error when trying grid forget
-            try:
-                self.btn.grid_forget()
-            except:
-                pass
+        elif self.btn is not None:
+            self.btn.grid_remove()
     
     def configure_image(self):
         """Sets the image that is on the tile. The image comes from the puzzle piece that is currently assigned."""
@@ -175,14 +273,15 @@ class Tile():
             )
 
     def tile_selected(self):
-        """When tile is selected execute method in puzzleboard object to swap pieces with blank tile"""
-        self.puzzleBoard.swap_pieces(self)
+        """When an active tile is selected execute method in puzzleboard object to swap pieces with blank tile"""
+        if self.active:
+            self.puzzleBoard.swap_pieces(self)
 
     def set_to_active(self):
         """Sets this tile to active"""
-        self.btn.config(command=self.tile_selected)
+        # the button command is set once when it is created, configuring a new one would register another Tcl command every move
+        self.active = True
     
     def set_to_disabled(self):
         """Sets this tile to disabled. Clicking has no action"""
-        if not self.puzzlePiece.isBlank:
-            self.btn.config(command=0)
\ No newline at end of file
+        self.active = False
\ No newline at end of file
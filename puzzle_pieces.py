@@ -4,7 +4,20 @@ from PIL import Image as Img
 from PIL import ImageTk, ImageStat
 import os
 import sys
+import threading
 
+# file types that can be used to decorate the puzzle
+VALID_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+# anything above the maximum is unnecessarily big and below the minimum will be poor resolution
+MIN_IMAGE_SIZE = 500
+MAX_IMAGE_SIZE = 4000
+# the largest side of the preview of the whole image
+PREVIEW_SIZE = 400
+# sizes of the pre-scaled copies of the puzzle image, each level is half the size of the one above
+LARGEST_LEVEL_SIZE = 1600
+SMALLEST_LEVEL_SIZE = 200
+# size of the seed each game is shuffled from, large enough that two games are never given the same one
+SEED_BITS = 63
 
 def __get_random_image():
     """Gets a random image from the images folder. Any images that are not valid are moved to invalidImages folder."""
@@ -35,33 +48,84 @@ def __get_random_image():
         os.rename(imagePath, "invalidImages/" + imageFile)
         # returning the function will run it again
         return  __get_random_image()
-    # check the size of the image - anything above 4000 pixels is unnecessarily big and below 500 will be poor resolution
-    isValidWidth = img.width < 4000 and img.width > 500
-    isValidHeight = img.height < 4000 and img.height > 500
+    # check the size of the image is within the limits
+    isValidWidth = img.width < MAX_IMAGE_SIZE and img.width > MIN_IMAGE_SIZE
+    isValidHeight = img.height < MAX_IMAGE_SIZE and img.height > MIN_IMAGE_SIZE
     img.close()
-    # if the image is a jpeg and is the right size then return it, else move image to invalid images and run the function again
-    if imagePath.endswith(('.jpg', '.jpeg')) and isValidWidth and isValidHeight:
+    # if the image is a valid type and is the right size then return it, else move image to invalid images and run the function again
+    if imagePath.lower().endswith(VALID_EXTENSIONS) and isValidWidth and isValidHeight:
         return imagePath
     else:
         os.rename(imagePath, "invalidImages/" + imageFile)
         return __get_random_image()
 
+# an image decoded in the background before it is needed, stored as a tuple of the file and its levels
+warmImage = None
+# held while an image is being decoded in the background so get waits for it rather than decoding another
+warmUpLock = threading.Lock()
 
-def get(numberOfPieces, boardWidth):
-    """Returns a random list of puzzle pieces"""
+
+def warm_up():
+    """Picks a random image and decodes it ready for the next puzzle. Run on a background thread"""
+    global warmImage
+    with warmUpLock:
+        if warmImage is not None:
+            return
+        # errors are left for __get_random_image to report when the puzzle is created, message boxes cannot be shown from this thread
+        try:
+            imageFiles = [file for file in os.listdir("images") if file.lower().endswith(VALID_EXTENSIONS)]
+            imageFile = "images/" + random.choice(imageFiles)
+            with Img.open(imageFile) as img:
+                isValidWidth = img.width < MAX_IMAGE_SIZE and img.width > MIN_IMAGE_SIZE
+                isValidHeight = img.height < MAX_IMAGE_SIZE and img.height > MIN_IMAGE_SIZE
+                if not (isValidWidth and isValidHeight):
+                    return
+            warmImage = imageFile, Image.load_levels(imageFile)
+        except Exception:
+            pass
+
+
+def __take_warm_image():
+    """Returns the image decoded in the background and starts decoding the next one. Returns None, None if there isn't one"""
+    global warmImage
+    with warmUpLock:
+        imageFile, levels = warmImage or (None, None)
+        warmImage = None
+    threading.Thread(target=warm_up, daemon=True).start()
+    return imageFile, levels
+
+
+def new_seed():
+    """Returns a random seed to shuffle a new game from"""
+    return random.getrandbits(SEED_BITS)
+
+
+def get_random_list(numberOfPieces, seed):
+    """Returns a solvable arrangement of the piece ids shuffled from the seed, the highest id is the blank piece.
+    The same seed always gives the same arrangement so the start of a recorded game can be rebuilt from its seed"""
+    generator = random.Random(seed)
     while True:
-        randomList = random.sample(range(numberOfPieces), numberOfPieces)
+        randomList = generator.sample(range(numberOfPieces), numberOfPieces)
         # it is possible to create a puzzle that is unsolveable so the list needs to be validated before continuing
-        if __is_random_list_valid(randomList):
-            break
+        # a puzzle that is already solved cannot be played either
+        if __is_random_list_valid(randomList) and randomList != list(range(numberOfPieces)):
+            return randomList
+
+
+def get(numberOfPieces, boardWidth, seed):
+    """Returns a list of puzzle pieces shuffled from the seed"""
+    randomList = get_random_list(numberOfPieces, seed)
     # get the square root of number of pieces
     sqrtNumberOfPieces = numberOfPieces ** 0.5
     sqrtNumberOfPieces = int(sqrtNumberOfPieces)
     # find the width of each piece by dividing width of board by square root of pieces
     pieceWidth = boardWidth // sqrtNumberOfPieces
-    imageFile = __get_random_image()
+    # use the image decoded in the background if there is one
+    imageFile, levels = __take_warm_image()
+    if imageFile is None:
+        imageFile = __get_random_image()
     # create the image object that will be used to decorate the pieces
-    image = Image(imageFile, sqrtNumberOfPieces)
+    image = Image(imageFile, sqrtNumberOfPieces, levels)
     # create the list of pieces
     pieces = [Piece(number, numberOfPieces, image, pieceWidth) for number in randomList]
     return image, pieces
@@ -101,17 +165,26 @@ class Piece():
         self.isBlank = False
         if self.id == numberOfPieces - 1:
             self.isBlank = True
-        # get image fragment that matches id
-        self.image = image.get_fragment(self.id)
+        self.set_size(image, pieceWidth)
+        # get the correct font size for displaying numbers on the puzzle piece
+        self.fontSize = Piece.font_size(numberOfPieces)
+
+    def set_size(self, image, pieceWidth):
+        """Cuts the image for this piece at the given width. Called again whenever the board is resized"""
+        # get image fragment that matches id from the level of the image closest to the size of the board
+        fragment = image.get_fragment(self.id, pieceWidth * image.sqrtNumberOfPieces)
         # resize the fragment to the size of a puzzle piece
-        self.image = self.image.resize((pieceWidth,pieceWidth), Img.ANTIALIAS)
+        fragment = fragment.resize((pieceWidth,pieceWidth), Img.LANCZOS)
         # calculate the correct font colour before image is converted to photo image
-        self.fontColour = Piece.font_colour(self.image, pieceWidth)
+        self.fontColour = Piece.font_colour(fragment, pieceWidth)
         # image is converted to photo image so it can be displayed by tk Button
-        self.image = ImageTk.PhotoImage(self.image)
-        # get the correct font size for displaying numbers on the puzzle piece
-        self.fontSize = Piece.font_size(numberOfPieces)
+        self.image = ImageTk.PhotoImage(fragment)
     
+    def release(self, tkApp):
+        """Deletes the Tk image of this piece straight away rather than waiting for it to be garbage collected"""
+        tkApp.call('image', 'delete', str(self.image))
+        self.image = None
+
     @property
     def display_properties(self):
         """Returns properties needed for displaying a number on puzzle piece"""
@@ -145,19 +218,62 @@ class Image():
         cropped = image.crop((left,top,right,bottom))
         return cropped
 
-    def __init__(self, imageFile, sqrtNumberOfPieces):
-        self.img = Img.open(imageFile)
-        self.img = Image.crop_image_square(self.img)
-        self.fragments = self.generate_fragments(sqrtNumberOfPieces)
+    @staticmethod
+    def load_levels(imageFile):
+        """Opens the image file and returns the levels of the image cropped to a square"""
+        # the full resolution image is only needed to create the levels, closing the file releases it straight away
+        with Img.open(imageFile) as img:
+            # jpegs can be decoded at a reduced scale as long as both sides are still bigger than the largest level
+            img.draft(None, (LARGEST_LEVEL_SIZE, LARGEST_LEVEL_SIZE))
+            img = Image.crop_image_square(img)
+            return Image.generate_levels(img)
+
+    def __init__(self, imageFile, sqrtNumberOfPieces, levels=None):
+        self.sqrtNumberOfPieces = sqrtNumberOfPieces
+        # pre-scaled copies of the image so pieces can be cut quickly at any board size, they may have already been loaded in the background
+        if levels is None:
+            levels = Image.load_levels(imageFile)
+        self.levels = levels
+        # fragments are only created for a level when the board is drawn at that size
+        self.fragments = {}
+        # keep a small copy of the whole image for previewing so the full resolution image is not needed
+        self.previewImg = self.get_level(PREVIEW_SIZE).resize((PREVIEW_SIZE, PREVIEW_SIZE), Img.LANCZOS)
+        self.previewPhoto = None
 
     @property
-    def whole_image(self):
-        return self.img
+    def preview(self):
+        """Returns the preview of the whole image as a photo image. It is only created the first time it is needed"""
+        if self.previewPhoto is None:
+            self.previewPhoto = ImageTk.PhotoImage(self.previewImg)
+        return self.previewPhoto
 
-    def generate_fragments(self, sqrtNumberOfPieces):
-        """Divides the whole image into fragments"""
+    @staticmethod
+    def generate_levels(image):
+        """Returns a list of copies of the image, from largest to smallest, each half the size of the last"""
+        # the largest level is a copy of the image unless it is bigger than is ever needed on screen
+        if image.width > LARGEST_LEVEL_SIZE:
+            level = image.resize((LARGEST_LEVEL_SIZE, LARGEST_LEVEL_SIZE), Img.LANCZOS)
+        else:
+            level = image.copy()
+        levels = [level]
+        # scaling each level from the one above is much faster than scaling from the whole image
+        while level.width // 2 >= SMALLEST_LEVEL_SIZE:
+            level = level.resize((level.width // 2, level.width // 2), Img.LANCZOS)
+            levels.append(level)
+        return levels
+
+    def get_level(self, size):
+        """Returns the smallest level that is at least the given size, or the largest level if none are big enough"""
+        # levels are ordered largest first so search from the end
+        for level in reversed(self.levels):
+            if level.width >= size:
+                return level
+        return self.levels[0]
+
+    def generate_fragments(self, level, sqrtNumberOfPieces):
+        """Divides a level of the image into fragments"""
         # find the size of each fragment
-        fragSize = self.img.width // sqrtNumberOfPieces
+        fragSize = level.width // sqrtNumberOfPieces
         fragments = []
         # initial coordinates for cropping - starting top left corner
         left = 0
@@ -167,7 +283,7 @@ class Image():
         # create fragments by cropping the image by row and column using the fragment size
         for row in range(sqrtNumberOfPieces):
             for column in range(sqrtNumberOfPieces):
-                image = self.img.crop((left,top,right,bottom))
+                image = level.crop((left,top,right,bottom))
                 fragments.append(image)
                 # after appending image increase cropping coordinates to the right by one fragment size to move to next column
                 left += fragSize
@@ -179,9 +295,22 @@ class Image():
             bottom += fragSize
         return fragments
 
-    def get_fragment(self, fragNumber):
-        """Returns a fragment of the whole image"""
-        return self.fragments[fragNumber]
+    def get_fragment(self, fragNumber, boardWidth):
+        """Returns a fragment of the level of the image closest to the given board width"""
+        level = self.get_level(boardWidth)
+        if level.width not in self.fragments:
+            self.fragments[level.width] = self.generate_fragments(level, self.sqrtNumberOfPieces)
+        return self.fragments[level.width][fragNumber]
+
+    def release_fragments(self):
+        """Releases the fragments once the pieces have been cut, they are created again if the board is resized"""
+        self.fragments = {}
+
+    def release(self, tkApp):
+        """Deletes the Tk image of the preview straight away rather than waiting for it to be garbage collected"""
+        if self.previewPhoto is not None:
+            tkApp.call('image', 'delete', str(self.previewPhoto))
+            self.previewPhoto = None
 
 
 def __get_parity(randomList):
@@ -1,8 +1,165 @@
 from tkinter import ttk
 import shelve
 import operator
+import os
+import json
+import logging
+import queue
+import socket
+import threading
+import time
 from tkinter.constants import RAISED
 
+DIFFICULTIES = ('Easy','Intermediate','Expert')
+# address of the shared leaderboard server as "host:port", scores are only kept locally if this is not set
+SERVER_ADDRESS = os.environ.get('SCORE_SERVER')
+# scores that could not be sent to the server are kept here until it can be reached again
+PENDING_FILE = "pending_scores.dat"
+
+logger = logging.getLogger(__name__)
+
+
+class Leaderboard_client():
+    """Client for the shared leaderboard server. Keeps a pool of open connections and queues scores
+    that cannot be sent while the server is unreachable"""
+    poolSize = 4
+    timeout = 2.0
+    retries = 3
+    # first retry waits this long (seconds) and every retry after waits twice as long as the last
+    backoff = 0.1
+    # after failing to reach the server don't try again for this long (seconds) unless submitting a score
+    offlinePeriod = 30
+
+    def __init__(self, address, pendingFile=PENDING_FILE):
+        host, port = address.rsplit(':', 1)
+        self.address = (host, int(port))
+        self.pendingFile = pendingFile
+        self.connections = queue.LifoQueue()
+        self.pendingLock = threading.Lock()
+        self.offlineUntil = 0
+
+    def new_connection(self):
+        """Opens a new connection to the server"""
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        return sock, sock.makefile('rb')
+
+    def get_connection(self):
+        """Returns an open connection from the pool and True, or a new connection and False if the pool is empty"""
+        try:
+            return self.connections.get_nowait(), True
+        except queue.Empty:
+            return self.new_connection(), False
+
+    def clear_pool(self):
+        """Closes every connection in the pool"""
+        while True:
+            try:
+                Leaderboard_client.close_connection(self.connections.get_nowait())
+            except queue.Empty:
+                return
+
+    def return_connection(self, connection):
+        """Puts a connection back in the pool to be reused, closing it if the pool is full"""
+        if self.connections.qsize() < self.poolSize:
+            self.connections.put(connection)
+        else:
+            Leaderboard_client.close_connection(connection)
+
+    @staticmethod
+    def close_connection(connection):
+        sock, reader = connection
+        reader.close()
+        sock.close()
+
+    @staticmethod
+    def exchange(connection, message):
+        """Sends a message on a connection and returns the response"""
+        sock, reader = connection
+        sock.sendall(json.dumps(message).encode() + b'\n')
+        line = reader.readline()
+        # an empty line means the server closed the connection
+        if not line:
+            raise ConnectionError("connection closed by server")
+        return json.loads(line)
+
+    def request(self, message, retries=0):
+        """Sends a request to the server and returns the response.
+        Raises OSError if the server cannot be reached or ValueError if the response is not valid"""
+        for attempt in range(retries + 1):
+            connection = None
+            try:
+                connection, pooled = self.get_connection()
+                try:
+                    response = Leaderboard_client.exchange(connection, message)
+                except (OSError, ValueError):
+                    if not pooled:
+                        raise
+                    # pooled connections go stale when the server restarts, so rather than counting this as a failed attempt
+                    # close the whole pool and try once more on a new connection
+                    Leaderboard_client.close_connection(connection)
+                    connection = None
+                    self.clear_pool()
+                    connection = self.new_connection()
+                    response = Leaderboard_client.exchange(connection, message)
+                self.return_connection(connection)
+                self.offlineUntil = 0
+                return response
+            except (OSError, ValueError) as error:
+                # a connection that failed may be broken so it is not put back in the pool
+                if connection is not None:
+                    Leaderboard_client.close_connection(connection)
+                lastError = error
+                if attempt < retries:
+                    time.sleep(self.backoff * 2 ** attempt)
+        self.offlineUntil = time.monotonic() + self.offlinePeriod
+        raise lastError
+
+    def submit(self, scoreData):
+        """Sends a score to the server along with any scores queued while it was unreachable.
+        Returns True if the server received them, otherwise the score is queued to be sent later"""
+        return self.send_pending(scoreData)
+
+    def send_pending(self, scoreData=None):
+        """Sends the scores queued while the server was unreachable, after adding the given score to the queue if there is one.
+        Returns True if the server received them, otherwise the scores not yet sent stay queued.
+        Scores the server rejects are logged and dropped as sending them again would not change the answer"""
+        with self.pendingLock:
+            file = shelve.open(self.pendingFile)
+            pending = file.get('scores', [])
+            if scoreData is not None:
+                pending.append(scoreData)
+            try:
+                while pending:
+                    response = self.request({'op': 'submit', 'score': pending[0]}, self.retries)
+                    # remove each score as soon as the server has answered so none are sent twice
+                    sent = pending.pop(0)
+                    if not response.get('ok'):
+                        logger.warning("Score for %s was rejected by the leaderboard server: %s", sent[3], response.get('error'))
+                return True
+            except (OSError, ValueError):
+                return False
+            finally:
+                file['scores'] = pending
+                file.close()
+
+    def top(self, difficulty, number):
+        """Returns the best scores for a difficulty from the server, or None if it cannot be reached"""
+        # don't keep the display waiting on a server that has just failed
+        if time.monotonic() < self.offlineUntil:
+            return None
+        try:
+            response = self.request({'op': 'top', 'difficulty': difficulty, 'k': number})
+        except (OSError, ValueError):
+            return None
+        if not response['ok']:
+            return None
+        return response['scores']
+
+
+# one client is shared by every scoreboard so the connection pool lasts between games
+leaderboardClient = Leaderboard_client(SERVER_ADDRESS) if SERVER_ADDRESS else None
+
+
 class Scoreboard():
     """Scoreboard object that displays lists of high scores"""
     @staticmethod
@@ -11,7 +168,7 @@ class Scoreboard():
         # open scores file - will create one if doesn't exist
         file = shelve.open(filePath)
         # iterate over difficulties and if shelf doesn't exist for that difficulty then create one
-        for difficulty in ('Easy','Intermediate','Expert'):
+        for difficulty in DIFFICULTIES:
             if difficulty not in file.keys():
                 file[difficulty] = []
         file.close()
@@ -33,18 +190,35 @@ class Scoreboard():
         self.create_score_frames()
 
     def write_score_to_file(self, scoreData):
-        """Shelves the incoming score data and updates the scoreboard display"""
+        """Shelves the incoming score data, sends it to the shared leaderboard if there is one and updates the scoreboard display"""
         file = shelve.open(self.filePath, writeback=True)
         # scoreData[4] is the number of tiles the game was played on
         difficulty = Scoreboard.get_difficulty(scoreData[4])
         # store the score data in relevent folder
         file[difficulty].append(scoreData)
         file.close()
-        # update the score display
-        self.update_specific(difficulty, 5)
+        if leaderboardClient is not None:
+            # sending may be slow if the server is unreachable so do it on another thread and update the display when it is done
+            sender = threading.Thread(target=leaderboardClient.submit, args=(scoreData,), daemon=True)
+            sender.start()
+            self.update_when_sent(sender, difficulty)
+        else:
+            # update the score display
+            self.update_specific(difficulty, 5)
+
+    def update_when_sent(self, sender, difficulty):
+        """Checks every 100ms whether the score has been sent and then updates the score display"""
+        # the scoreboard is destroyed if the game ends before the score is sent
+        if not self.frame.winfo_exists():
+            return
+        # tk widgets can only be updated from the main thread so poll rather than updating from the sending thread
+        if sender.is_alive():
+            self.frame.after(100, self.update_when_sent, sender, difficulty)
+        else:
+            self.update_specific(difficulty, 5)
     
     def get_ordered_scores(self, difficulty):
-        """Returns an ordered list of scores from file for a given difficulty"""
+        """Returns an ordered list of scores for a given difficulty from file"""
         file = shelve.open(self.filePath)
         # sort list on moves and then time(sec)
         sortedList = sorted(file[difficulty], key=operator.itemgetter(0,1))
@@ -74,12 +248,46 @@ class Scoreboard():
     
     def update_specific(self, difficulty, rows):
         """Update one specific score display"""
-        self.scoreDisplay[difficulty].update(self.get_ordered_scores(difficulty), rows)
+        self.update_displays((difficulty,), rows)
 
     def update_all(self, rows):
         """Update all score displays"""
-        for difficulty, scoreList in self.scoreDisplay.items():
-            scoreList.update(self.get_ordered_scores(difficulty), rows)
+        self.update_displays(tuple(self.scoreDisplay), rows)
+
+    def update_displays(self, difficulties, rows):
+        """Shows the scores from file in the given displays, then replaces them with the shared leaderboard if there is one"""
+        for difficulty in difficulties:
+            self.scoreDisplay[difficulty].update(self.get_ordered_scores(difficulty), rows)
+        if leaderboardClient is not None:
+            # the server may be slow or unreachable so fetch the scores on another thread rather than freezing the window
+            topScores = {}
+            fetcher = threading.Thread(target=Scoreboard.fetch_top, args=(difficulties, self.showScores, topScores), daemon=True)
+            fetcher.start()
+            self.update_when_fetched(fetcher, topScores, rows)
+
+    @staticmethod
+    def fetch_top(difficulties, number, topScores):
+        """Gets the best scores for each difficulty from the shared leaderboard. Runs on a background thread"""
+        for difficulty in difficulties:
+            topScores[difficulty] = leaderboardClient.top(difficulty, number)
+        # the server can be reached again so send any scores queued while it could not be,
+        # otherwise they would wait until the next score is submitted
+        if any(scores is not None for scores in topScores.values()):
+            leaderboardClient.send_pending()
+
+    def update_when_fetched(self, fetcher, topScores, rows):
+        """Checks every 100ms whether the scores have been fetched from the shared leaderboard and then shows them"""
+        # the scoreboard is destroyed if the game ends before the scores are fetched
+        if not self.frame.winfo_exists():
+            return
+        # tk widgets can only be updated from the main thread so poll rather than updating from the fetching thread
+        if fetcher.is_alive():
+            self.frame.after(100, self.update_when_fetched, fetcher, topScores, rows)
+            return
+        # the scores from file stay on display for any difficulty the server did not answer for
+        for difficulty, scores in topScores.items():
+            if scores is not None:
+                self.scoreDisplay[difficulty].update(scores, rows)
 
 
 class Full_scoreboard(Scoreboard):
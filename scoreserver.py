@@ -0,0 +1,266 @@
+import argparse
+import asyncio
+import json
+import operator
+import os
+import shelve
+import signal
+import tempfile
+import time
+from scoreboard import Scoreboard, DIFFICULTIES
+import puzzle_pieces
+from solver import Solver
+import verify
+
+# submissions are collected and added to the scoreboard together at most this often (seconds)
+BATCH_INTERVAL = 0.05
+# the scores in memory are written to the snapshot file this often (seconds)
+SNAPSHOT_INTERVAL = 30
+# largest number of scores that can be requested at once
+MAX_TOP = 100
+DEFAULT_PORT = 8765
+# the type of each value in a submitted score, in the order they are stored
+# [moves, time(sec), time "HH:MM:SS", name, number of tiles, no hints, start position, moves played, seed]
+SCORE_TYPES = (int, int, str, str, int, bool, str, str, int)
+
+
+class Score_server():
+    """Shared leaderboard that accepts line delimited JSON requests over TCP.
+    Scores are held in memory sorted on moves and then time(sec) and periodically saved to a snapshot file
+    in the same format as the local scores file"""
+    def __init__(self, filePath):
+        self.filePath = filePath
+        Scoreboard.shelve_setup(self.filePath)
+        file = shelve.open(self.filePath)
+        self.scores = {difficulty: sorted(file[difficulty], key=operator.itemgetter(0,1)) for difficulty in DIFFICULTIES}
+        file.close()
+        # each seed can only be used for one score, otherwise the same solved game could be submitted again and again
+        self.seenSeeds = set(scoreData[8] for scoreList in self.scores.values() for scoreData in scoreList if len(scoreData) >= 9)
+        # submissions waiting for the next batch, each paired with the future that is resolved once it has been added
+        self.pending = []
+        self.batchReady = None
+        self.changed = False
+
+    async def serve(self, host, port):
+        """Starts the server and runs until it is cancelled, saving a final snapshot on the way out"""
+        self.batchReady = asyncio.Event()
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=4096)
+        batcher = asyncio.create_task(self.add_batches())
+        snapshotter = asyncio.create_task(self.take_snapshots())
+        # stop cleanly when asked to terminate so the last scores are saved, windows does not support signal handlers
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except NotImplementedError:
+            pass
+        try:
+            async with server:
+                await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            batcher.cancel()
+            snapshotter.cancel()
+            self.add_batch()
+            await asyncio.get_running_loop().run_in_executor(None, self.write_snapshot, self.copy_scores())
+
+    async def handle_connection(self, reader, writer):
+        """Answers requests from one client until it disconnects. Each request and response is a single line of JSON"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self.handle_request(json.loads(line))
+                except (ValueError, KeyError, TypeError, IndexError) as error:
+                    response = {'ok': False, 'error': str(error)}
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # connections are cancelled when the server stops
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, request):
+        """Returns the response to a single request"""
+        if request['op'] == 'submit':
+            scoreData = list(request['score'])
+            Score_server.check_score(scoreData)
+            # scoreData[4] is the number of tiles the game was played on
+            if Scoreboard.get_difficulty(scoreData[4]) is None:
+                raise ValueError("invalid number of tiles {0}".format(scoreData[4]))
+            # scores are only accepted if the recorded game replays to a solved puzzle in the number of moves claimed
+            reason = verify.verify_score(scoreData)
+            if reason is not None:
+                raise ValueError("score failed verification: {0}".format(reason))
+            # scoreData[8] is the seed the start position was shuffled from
+            if scoreData[8] in self.seenSeeds:
+                raise ValueError("a score has already been submitted for seed {0}".format(scoreData[8]))
+            self.seenSeeds.add(scoreData[8])
+            added = asyncio.get_running_loop().create_future()
+            self.pending.append((scoreData, added))
+            self.batchReady.set()
+            # only acknowledge the score once it has been added to the scoreboard
+            await added
+            return {'ok': True}
+        elif request['op'] == 'top':
+            # a negative number would slice from the end and return almost the whole list
+            number = max(0, min(int(request.get('k', 5)), MAX_TOP))
+            return {'ok': True, 'scores': self.scores[request['difficulty']][:number]}
+        else:
+            raise ValueError("unknown op {0}".format(request['op']))
+
+    @staticmethod
+    def check_score(scoreData):
+        """Raises ValueError if the score does not have the values of a saved score, so it can never break sorting the scoreboard"""
+        if len(scoreData) != len(SCORE_TYPES):
+            raise ValueError("expected {0} values in score but found {1}".format(len(SCORE_TYPES), len(scoreData)))
+        for position, (value, valueType) in enumerate(zip(scoreData, SCORE_TYPES)):
+            # bool is a subclass of int so the types are compared exactly
+            if type(value) is not valueType:
+                raise ValueError("value {0} of score should be {1} but is {2}".format(position, valueType.__name__, type(value).__name__))
+
+    async def add_batches(self):
+        """Adds waiting submissions to the scoreboard in batches rather than one at a time"""
+        while True:
+            await self.batchReady.wait()
+            # wait a moment so submissions arriving together are added together
+            await asyncio.sleep(BATCH_INTERVAL)
+            self.add_batch()
+
+    def add_batch(self):
+        """Adds every waiting submission to the scoreboard and acknowledges them"""
+        batch = self.pending
+        self.pending = []
+        self.batchReady.clear()
+        if not batch:
+            return
+        changedDifficulties = set()
+        try:
+            for scoreData, added in batch:
+                difficulty = Scoreboard.get_difficulty(scoreData[4])
+                changedDifficulties.add(difficulty)
+                self.scores[difficulty].append(scoreData)
+            # the lists are already sorted apart from the new scores at the end, which sorting handles in close to linear time
+            for difficulty in changedDifficulties:
+                self.scores[difficulty].sort(key=operator.itemgetter(0,1))
+        except (ValueError, KeyError, TypeError, IndexError) as error:
+            # take the whole batch back out so one bad score cannot stop later scores being added
+            batchIds = set(id(scoreData) for scoreData, added in batch)
+            for difficulty in changedDifficulties:
+                if difficulty in self.scores:
+                    scoreList = [scoreData for scoreData in self.scores[difficulty] if id(scoreData) not in batchIds]
+                    self.scores[difficulty] = sorted(scoreList, key=operator.itemgetter(0,1))
+            for scoreData, added in batch:
+                if not added.done():
+                    added.set_exception(ValueError("score could not be added: {0}".format(error)))
+            return
+        for scoreData, added in batch:
+            if not added.done():
+                added.set_result(True)
+        self.changed = True
+
+    async def take_snapshots(self):
+        """Saves the scores to file every snapshot interval if any have been added"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+            if self.changed:
+                self.changed = False
+                # writing the file happens on another thread so requests are still answered while it is saved
+                await loop.run_in_executor(None, self.write_snapshot, self.copy_scores())
+
+    def copy_scores(self):
+        """Returns a copy of the score lists that will not change while the snapshot is written"""
+        return {difficulty: list(scoreList) for difficulty, scoreList in self.scores.items()}
+
+    def write_snapshot(self, scores):
+        """Writes the scores to the snapshot file"""
+        file = shelve.open(self.filePath)
+        for difficulty, scoreList in scores.items():
+            file[difficulty] = scoreList
+        file.close()
+
+
+async def load_test(submitters):
+    """Runs a server on localhost and submits a score from many clients at the same time. Prints the throughput and latency"""
+    # the scores from a load test are thrown away afterwards
+    folder = tempfile.TemporaryDirectory()
+    server = Score_server(os.path.join(folder.name, "scores.dat"))
+    serverTask = asyncio.create_task(server.serve('127.0.0.1', DEFAULT_PORT + 1))
+    # give the server a moment to start listening
+    await asyncio.sleep(0.2)
+    latencies = []
+    failures = 0
+    # every submitted score needs its own seed and a recorded game that solves the puzzle shuffled from it to pass verification.
+    # Only easy puzzles are used as they are the only ones that can be solved quickly
+    solver = Solver(3)
+    games = []
+    for number in range(submitters):
+        start = puzzle_pieces.get_random_list(9, number)
+        games.append((" ".join(str(piece) for piece in start), solver.solve(start), number))
+
+    async def submitter(number):
+        nonlocal failures
+        start, movesPlayed, seed = games[number]
+        scoreData = [len(movesPlayed), number % 600, time.strftime("%H:%M:%S", time.gmtime(number % 600)), "Kiosk {0}".format(number), 9, False, start, movesPlayed, seed]
+        start = time.perf_counter()
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', DEFAULT_PORT + 1)
+            writer.write(json.dumps({'op': 'submit', 'score': scoreData}).encode() + b'\n')
+            writer.write(json.dumps({'op': 'top', 'difficulty': 'Easy', 'k': 5}).encode() + b'\n')
+            await writer.drain()
+            submitted = json.loads(await reader.readline())
+            top = json.loads(await reader.readline())
+            writer.close()
+            if not (submitted['ok'] and top['ok']):
+                failures += 1
+                return
+        except (OSError, ValueError):
+            failures += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(submitter(i) for i in range(submitters)))
+    elapsed = time.perf_counter() - start
+    serverTask.cancel()
+    await serverTask
+    folder.cleanup()
+    latencies.sort()
+    print("{0} submitters, {1} failed, {2:.2f}s, {3:.0f} submissions/s".format(submitters, failures, elapsed, len(latencies) / elapsed))
+    if latencies:
+        for percentile in (50, 90, 99):
+            index = min(len(latencies) - 1, len(latencies) * percentile // 100)
+            print("p{0} latency {1:.1f} ms".format(percentile, latencies[index] * 1000))
+    return failures == 0
+
+
+def raise_open_file_limit():
+    """Each submitter in the load test needs its own socket so allow as many open files as the system permits"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Shared leaderboard server for several copies of the game")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="port to listen on (default: {0})".format(DEFAULT_PORT))
+    parser.add_argument('--file', default="server_scores.dat", help="file the scores are saved to (default: server_scores.dat)")
+    parser.add_argument('--load-test', type=int, metavar='SUBMITTERS', help="run a load test with this many concurrent submitters instead")
+    args = parser.parse_args()
+    if args.load_test:
+        raise_open_file_limit()
+        if not asyncio.run(load_test(args.load_test)):
+            raise SystemExit("Some submissions failed")
+    else:
+        try:
+            asyncio.run(Score_server(args.file).serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,204 @@
+import argparse
+import csv
+import heapq
+import json
+import operator
+import shelve
+from scoreboard import Scoreboard, DIFFICULTIES
+
+# names of the values in a score, in the order they are stored in the scores file
+FIELDS = ('moves', 'time_sec', 'time', 'name', 'tiles', 'no_hints', 'start', 'moves_played', 'seed')
+# scores saved before games were recorded do not have a start position, moves played or seed
+# and scores saved before seeds were recorded do not have a seed, the values they are missing are filled in with these
+MISSING_VALUES = ('', '', None)
+# position of each difficulty in exported files, files are sorted by difficulty and then moves and time(sec)
+TILES_ORDER = {9: 0, 16: 1, 25: 2}
+
+
+# boolean values as they may be written in a csv file
+BOOLEANS = {'True': True, 'False': False, 'true': True, 'false': False, '1': True, '0': False, '': False}
+
+
+def check_tiles(score):
+    """Returns the score, raising ValueError if it was not played on one of the board sizes"""
+    if score[4] not in TILES_ORDER:
+        raise ValueError("invalid number of tiles {0}".format(score[4]))
+    return score
+
+
+def parse_row(row):
+    """Converts the values in a row read from a csv file back to their original types"""
+    if len(row) != len(FIELDS):
+        raise ValueError("expected {0} values but found {1}".format(len(FIELDS), len(row)))
+    moves, timeSec, time, name, tiles, noHints, start, movesPlayed, seed = row
+    if noHints not in BOOLEANS:
+        raise ValueError("invalid boolean {0}".format(noHints))
+    # a missing seed is written as an empty value
+    return check_tiles([int(moves), int(timeSec), time, name, int(tiles), BOOLEANS[noHints], start, movesPlayed, int(seed) if seed else None])
+
+
+def parse_record(record):
+    """Converts a record read from a jsonl file to a score, filling in any recorded game values it is missing"""
+    defaults = dict(zip(FIELDS[-len(MISSING_VALUES):], MISSING_VALUES))
+    missing = [field for field in FIELDS if field not in record and field not in defaults]
+    if missing:
+        raise ValueError("record is missing {0}".format(', '.join(missing)))
+    # every value is looked up by name so a missing one cannot shift the values after it into the wrong place
+    return check_tiles([record[field] if field in record else defaults[field] for field in FIELDS])
+
+
+def complete_score(score):
+    """Returns the score with the values it is missing filled in if it was saved before games or seeds were recorded"""
+    return list(score) + list(MISSING_VALUES[len(score) - (len(FIELDS) - len(MISSING_VALUES)):])
+
+
+def sort_key(score):
+    """Returns the key scores are sorted on - difficulty, moves and then time(sec)"""
+    return TILES_ORDER[score[4]], score[0], score[1]
+
+
+def file_format(path, fileFormat=None):
+    """Returns the format of the file, either given or found from the file extension"""
+    if fileFormat is None:
+        fileFormat = path.rsplit('.', 1)[-1].lower()
+    if fileFormat not in ('csv', 'jsonl'):
+        raise ValueError("unknown file format {0}, expected csv or jsonl".format(fileFormat))
+    return fileFormat
+
+
+def read_scores(path, fileFormat=None):
+    """Yields the scores in a csv or jsonl file one at a time"""
+    fileFormat = file_format(path, fileFormat)
+    with open(path, newline='', encoding='utf-8') as file:
+        if fileFormat == 'csv':
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if header is None:
+                return
+            # files exported before games or seeds were recorded have fewer columns
+            if tuple(header) not in (FIELDS[:-len(MISSING_VALUES)], FIELDS[:-1], FIELDS):
+                raise ValueError("{0} does not have the expected columns {1}".format(path, ','.join(FIELDS)))
+            for row in reader:
+                yield parse_row(row + [''] * (len(FIELDS) - len(header)))
+        else:
+            for line in file:
+                if line.strip():
+                    yield parse_record(json.loads(line))
+
+
+def read_sorted_scores(path, fileFormat=None):
+    """Yields each score in a file paired with its sort key, checking they are in sorted order as they are needed for merging"""
+    previousKey = None
+    for score in read_scores(path, fileFormat):
+        key = sort_key(score)
+        if previousKey is not None and key < previousKey:
+            raise ValueError("{0} is not sorted, export it from a scores file before merging".format(path))
+        previousKey = key
+        yield key, score
+
+
+def write_scores(path, scores, fileFormat=None):
+    """Writes scores to a csv or jsonl file as they are produced. Returns the number of scores written"""
+    fileFormat = file_format(path, fileFormat)
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        if fileFormat == 'csv':
+            writer = csv.writer(file)
+            writer.writerow(FIELDS)
+            for score in scores:
+                writer.writerow(score)
+                count += 1
+        else:
+            for score in scores:
+                file.write(json.dumps(dict(zip(FIELDS, score))) + '\n')
+                count += 1
+    return count
+
+
+def stored_scores(filePath):
+    """Yields the scores in a scores file sorted by difficulty, moves and then time(sec)"""
+    Scoreboard.shelve_setup(filePath)
+    file = shelve.open(filePath, flag='r')
+    try:
+        # each difficulty is stored as a single list so only one difficulty is loaded at a time
+        # the difficulties are in the same order as TILES_ORDER
+        for difficulty in DIFFICULTIES:
+            for score in sorted(file[difficulty], key=operator.itemgetter(0,1)):
+                yield complete_score(score)
+    finally:
+        file.close()
+
+
+def merge_scores(paths, fileFormat=None):
+    """Yields the scores from several sorted files in sorted order, skipping scores that appear more than once"""
+    streams = [read_sorted_scores(path, fileFormat) for path in paths]
+    previousKey = None
+    # only scores with the same key can be duplicates so only those need to be remembered
+    seen = set()
+    # the streams are already paired with their keys so merge compares them directly rather than calling a key function
+    for key, score in heapq.merge(*streams):
+        if key != previousKey:
+            previousKey = key
+            seen.clear()
+        record = tuple(score)
+        if record not in seen:
+            seen.add(record)
+            yield score
+
+
+def export_scores(filePath, outputPath, fileFormat=None):
+    """Writes every score in the scores file to a csv or jsonl file. Returns the number of scores written"""
+    return write_scores(outputPath, stored_scores(filePath), fileFormat)
+
+
+def import_scores(filePath, inputPath, fileFormat=None):
+    """Adds the scores in a csv or jsonl file to the scores file, skipping scores that are already stored.
+    Returns the number of scores added"""
+    Scoreboard.shelve_setup(filePath)
+    # the scores file keeps each difficulty as a single list, so new scores are collected and each list is written once
+    newScores = {difficulty: [] for difficulty in DIFFICULTIES}
+    for score in read_scores(inputPath, fileFormat):
+        newScores[Scoreboard.get_difficulty(score[4])].append(score)
+    added = 0
+    file = shelve.open(filePath)
+    try:
+        for difficulty, scores in newScores.items():
+            if not scores:
+                continue
+            storedScores = file[difficulty]
+            seen = set(tuple(complete_score(score)) for score in storedScores)
+            for score in scores:
+                record = tuple(score)
+                if record not in seen:
+                    seen.add(record)
+                    storedScores.append(score)
+                    added += 1
+            file[difficulty] = storedScores
+    finally:
+        file.close()
+    return added
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export, import and merge scores as csv or jsonl files")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help="file format (default: from the file extension)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    exportParser = commands.add_parser('export', help="write the scores in a scores file to a csv or jsonl file")
+    exportParser.add_argument('output')
+    exportParser.add_argument('--file', default="scores.dat", help="scores file (default: scores.dat)")
+    importParser = commands.add_parser('import', help="add the scores in a csv or jsonl file to a scores file")
+    importParser.add_argument('input')
+    importParser.add_argument('--file', default="scores.dat", help="scores file (default: scores.dat)")
+    mergeParser = commands.add_parser('merge', help="merge exported files into one file without duplicates")
+    mergeParser.add_argument('output')
+    mergeParser.add_argument('inputs', nargs='+')
+    args = parser.parse_args()
+    try:
+        if args.command == 'export':
+            print("Exported {0} scores".format(export_scores(args.file, args.output, args.format)))
+        elif args.command == 'import':
+            print("Imported {0} scores".format(import_scores(args.file, args.input, args.format)))
+        else:
+            print("Merged {0} scores".format(write_scores(args.output, merge_scores(args.inputs, args.format), args.format)))
+    except (OSError, ValueError, KeyError) as error:
+        parser.exit(1, "Error: {0}\n".format(error))
@@ -0,0 +1,47 @@
+import argparse
+import sys
+import tkinter as tk
+import style
+import base
+import memory
+
+# memory used by the first games is ignored while caches and the Tk image machinery warm up
+WARM_UP_GAMES = 20
+
+
+def soak(restarts, allowedGrowth):
+    """Restarts the game repeatedly on a hidden window and returns True if memory use stays flat"""
+    root = tk.Tk()
+    # the window is never shown so this can run on a headless machine with a virtual display
+    root.withdraw()
+    style.configuration()
+    baseFrame = base.Frame(root)
+    samples = []
+    for i in range(restarts):
+        # cycle through the difficulties the same way a player would using restart and new game
+        baseFrame.play_game((9, 16, 25)[i % 3])
+        # the timer thread updates the header from another thread, which tk only allows while mainloop is running
+        baseFrame.header.stop_timer()
+        root.update()
+        samples.append(memory.get_rss())
+    root.destroy()
+    if None in samples:
+        print("Memory in use cannot be read on this platform")
+        return False
+    baseline = max(samples[WARM_UP_GAMES:WARM_UP_GAMES * 2])
+    final = max(samples[-WARM_UP_GAMES:])
+    growth = final - baseline
+    print("Memory after {0} games: {1}, after {2} games: {3}, growth {4}".format(
+        WARM_UP_GAMES * 2, memory.format_rss(baseline), restarts, memory.format_rss(final), memory.format_rss(growth)))
+    return growth <= allowedGrowth
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check memory use stays flat when the game is restarted many times")
+    parser.add_argument('--restarts', type=int, default=500, help="number of games to start (default: 500)")
+    parser.add_argument('--allowed-growth', type=float, default=10, help="megabytes memory may grow by before failing (default: 10)")
+    args = parser.parse_args()
+    if args.restarts < WARM_UP_GAMES * 3:
+        parser.error("at least {0} restarts are needed".format(WARM_UP_GAMES * 3))
+    if not soak(args.restarts, args.allowed_growth * 1024 ** 2):
+        sys.exit("Memory use grew over the restarts")
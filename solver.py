@@ -0,0 +1,360 @@
+import argparse
+import array
+import os
+import pickle
+import random
+import sys
+import time
+import puzzle_pieces
+import verify
+
+# the walking distance tables are generated once and saved here
+TABLES_FOLDER = "wd_tables"
+# the goal rows that are counted together in each walking distance table for each board size.
+# 3x3 and 4x4 tables count every goal row separately. Counting every goal row separately on 5x5 gives 65 million
+# states, far too many to generate and load quickly, so several smaller tables that each merge some goal rows are used
+# and the largest of their distances is taken. Merging goal rows can only make the distance smaller so it is still a lower bound
+TABLE_GROUPS = {
+    3: [((0,), (1,), (2,))],
+    4: [((0,), (1,), (2,), (3,))],
+    5: [((0, 1), (2,), (3, 4)), ((0,), (1,), (2, 3, 4)), ((0, 1, 2), (3,), (4,))]
+}
+HEURISTICS = ('manhattan', 'linear conflict', 'walking distance')
+# marks a move in the transition table that is not possible
+NO_STATE = 0xFFFFFFFF
+
+
+class Walking_distance_table():
+    """Table of the walking distance for every arrangement of tiles between rows.
+    A state counts, for each row, how many of its tiles belong in each goal row (or group of goal rows), along with the
+    row of the blank. The walking distance of a state is the fewest vertical moves needed to reach the goal state.
+    The same table is used for columns by swapping rows and columns"""
+    @staticmethod
+    def file_name(size, groups):
+        """Returns the file the table is saved in"""
+        groupNames = "_".join("".join(str(row) for row in group) for group in groups)
+        return os.path.join(TABLES_FOLDER, "wd_{0}_{1}.pickle".format(size, groupNames))
+
+    def __init__(self, size, groups):
+        self.size = size
+        self.groups = groups
+        self.numberOfGroups = len(groups)
+        # the group each goal row belongs to
+        self.rowGroups = [0] * size
+        for group, rows in enumerate(groups):
+            for row in rows:
+                self.rowGroups[row] = group
+        # states are encoded as a number with one digit per count, so the base must be bigger than the largest count
+        self.base = size * max(len(group) for group in groups) + 1
+        fileName = Walking_distance_table.file_name(size, groups)
+        try:
+            with open(fileName, 'rb') as file:
+                self.keys, self.distances, self.transitions = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            self.keys, self.distances, self.transitions = self.generate()
+            if not os.path.exists(TABLES_FOLDER):
+                os.mkdir(TABLES_FOLDER)
+            with open(fileName, 'wb') as file:
+                pickle.dump((self.keys, self.distances, self.transitions), file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def encode(self, counts, blankRow):
+        """Returns the number that represents a state"""
+        key = blankRow
+        for count in counts:
+            key = key * self.base + count
+        return key
+
+    def generate(self):
+        """Searches every state outwards from the goal state and returns the state keys, the distance of each state
+        and the state reached by each move from each state"""
+        size = self.size
+        groups = self.numberOfGroups
+        # in the goal state every row only has tiles that belong in it, the bottom row is one short because of the blank
+        goal = [0] * (size * groups)
+        for row in range(size):
+            goal[row * groups + self.rowGroups[row]] = size
+        goal[(size - 1) * groups + self.rowGroups[size - 1]] -= 1
+        states = [(goal, size - 1)]
+        indexes = {self.encode(goal, size - 1): 0}
+        keys = array.array('Q', [self.encode(goal, size - 1)])
+        distances = array.array('B', [0])
+        # for each state, for moving the blank up (0) or down (1), for the group of the tile that swaps with it
+        transitions = array.array('I')
+        # states are numbered in the order they are found, so working through them in order is a breadth first search
+        i = 0
+        while i < len(states):
+            counts, blankRow = states[i]
+            for direction, newBlankRow in enumerate((blankRow - 1, blankRow + 1)):
+                for group in range(groups):
+                    if not 0 <= newBlankRow < size or counts[newBlankRow * groups + group] == 0:
+                        transitions.append(NO_STATE)
+                        continue
+                    # a tile of this group moves from the blank's new row into its old row
+                    newCounts = counts[:]
+                    newCounts[newBlankRow * groups + group] -= 1
+                    newCounts[blankRow * groups + group] += 1
+                    key = self.encode(newCounts, newBlankRow)
+                    if key not in indexes:
+                        indexes[key] = len(states)
+                        states.append((newCounts, newBlankRow))
+                        keys.append(key)
+                        distances.append(distances[i] + 1)
+                    transitions.append(indexes[key])
+            i += 1
+        return keys, distances, transitions
+
+    def get_state(self, board, byColumn):
+        """Returns the state of a board, looking at rows or at columns"""
+        size = self.size
+        groups = self.numberOfGroups
+        counts = [0] * (size * groups)
+        blankLine = 0
+        for position, tile in enumerate(board):
+            row, column = divmod(position, size)
+            goalRow, goalColumn = divmod(tile, size)
+            line, goalLine = (column, goalColumn) if byColumn else (row, goalRow)
+            if tile == size * size - 1:
+                blankLine = line
+            else:
+                counts[line * groups + self.rowGroups[goalLine]] += 1
+        return self.keys.index(self.encode(counts, blankLine))
+
+
+def get_tables(size):
+    """Returns the walking distance tables for a board size"""
+    return [Walking_distance_table(size, groups) for groups in TABLE_GROUPS[size]]
+
+
+def line_conflicts(tiles):
+    """Returns the extra moves needed because tiles in a line (row or column) that belong in it are in the wrong order.
+    Takes the goal positions along the line of those tiles in the order they are in.
+    Every tile that is not part of the longest correctly ordered sequence must leave the line and come back, two extra moves"""
+    if len(tiles) < 2:
+        return 0
+    # longest increasing subsequence, lines are at most 5 tiles so the simple method is fast enough
+    longest = [1] * len(tiles)
+    for i in range(len(tiles)):
+        for j in range(i):
+            if tiles[j] < tiles[i] and longest[j] + 1 > longest[i]:
+                longest[i] = longest[j] + 1
+    return 2 * (len(tiles) - max(longest))
+
+
+class Solver():
+    """Finds the fewest moves to solve a board with iterative deepening A* search.
+    The heuristic is one of HEURISTICS - manhattan distance, manhattan distance plus linear conflicts,
+    or the largest of that and the walking distance"""
+    def __init__(self, size, heuristic='walking distance'):
+        if heuristic not in HEURISTICS:
+            raise ValueError("unknown heuristic {0}, expected one of {1}".format(heuristic, ", ".join(HEURISTICS)))
+        self.size = size
+        self.heuristic = heuristic
+        self.tables = get_tables(size) if heuristic == 'walking distance' else []
+        self.nodes = 0
+        # linear conflicts of each row and column seen, keyed by the row or column number followed by its tiles
+        self.conflictCache = {}
+
+    def row_conflicts(self, board, row):
+        """Returns the linear conflicts in a row of the board"""
+        size = self.size
+        key = (row, *board[row * size:row * size + size])
+        # the same rows come up again and again during a search so each one is only worked out once
+        if key not in self.conflictCache:
+            self.conflictCache[key] = line_conflicts([tile % size for tile in key[1:]
+                                                      if tile != size * size - 1 and tile // size == row])
+        return self.conflictCache[key]
+
+    def column_conflicts(self, board, column):
+        """Returns the linear conflicts in a column of the board"""
+        size = self.size
+        # columns are numbered after the rows so they have different keys in the cache
+        key = (size + column, *board[column::size])
+        if key not in self.conflictCache:
+            self.conflictCache[key] = line_conflicts([tile // size for tile in key[1:]
+                                                      if tile != size * size - 1 and tile % size == column])
+        return self.conflictCache[key]
+
+    def solve(self, board, nodeLimit=None):
+        """Returns a string with a letter for each move (the direction the piece slides, as recorded with scores)
+        that solves the board in the fewest moves. Returns None if the node limit is reached first"""
+        size = self.size
+        blankTile = size * size - 1
+        board = list(board)
+        blank = board.index(blankTile)
+        useConflicts = self.heuristic != 'manhattan'
+        useWalkingDistance = self.heuristic == 'walking distance'
+        distance = sum(abs(position // size - tile // size) + abs(position % size - tile % size)
+                       for position, tile in enumerate(board) if tile != blankTile)
+        rowConflicts = [self.row_conflicts(board, row) if useConflicts else 0 for row in range(size)]
+        columnConflicts = [self.column_conflicts(board, column) if useConflicts else 0 for column in range(size)]
+        conflicts = sum(rowConflicts) + sum(columnConflicts)
+        tables = self.tables
+        rowStates = [table.get_state(board, False) for table in tables]
+        columnStates = [table.get_state(board, True) for table in tables]
+        # the row and column of each tile's goal position, looked up rather than calculated at every node
+        goalRows = [tile // size for tile in range(size * size)]
+        goalColumns = [tile % size for tile in range(size * size)]
+        # for each table, the group of the goal row (or goal column) of each tile
+        tileGroups = [[table.rowGroups[goalRows[tile]] for tile in range(size * size)] for table in tables]
+        tileColumnGroups = [[table.rowGroups[goalColumns[tile]] for tile in range(size * size)] for table in tables]
+        # moves of the blank: change in position, letter for the direction the tile slides, the opposite move
+        moves = ((1, 'L', -1), (-1, 'R', 1), (size, 'U', -size), (-size, 'D', size))
+        path = []
+        self.nodes = 0
+
+        def get_estimate():
+            """Returns the estimated number of moves to solve the board in its current state"""
+            estimate = distance + conflicts
+            if useWalkingDistance:
+                for table, rowState, columnState in zip(tables, rowStates, columnStates):
+                    walkingDistance = table.distances[rowState] + table.distances[columnState]
+                    if walkingDistance > estimate:
+                        estimate = walkingDistance
+            return estimate
+
+        def search(moved, bound, lastStep):
+            """Depth first search below the current board. Returns True once solved, else the smallest estimate over the bound"""
+            nonlocal blank, distance, conflicts
+            self.nodes += 1
+            if nodeLimit is not None and self.nodes > nodeLimit:
+                return None
+            estimate = moved + get_estimate()
+            if estimate > bound:
+                return estimate
+            if distance == 0:
+                return True
+            smallest = sys.maxsize
+            blankRow, blankColumn = divmod(blank, size)
+            for step, letter, opposite in moves:
+                # don't undo the last move
+                if step == lastStep:
+                    continue
+                newBlank = blank + step
+                if step == 1 and blankColumn == size - 1 or step == -1 and blankColumn == 0 or not 0 <= newBlank < size * size:
+                    continue
+                tile = board[newBlank]
+                vertical = abs(step) == size
+                # the tile moves from the blank's new position into its old position
+                oldDistance = abs(newBlank // size - goalRows[tile]) + abs(newBlank % size - goalColumns[tile])
+                newDistance = abs(blankRow - goalRows[tile]) + abs(blankColumn - goalColumns[tile])
+                board[blank], board[newBlank] = tile, blankTile
+                savedBlank = blank
+                blank = newBlank
+                distance += newDistance - oldDistance
+                savedConflicts = conflicts
+                if useConflicts:
+                    # only the two lines the tile moved between can have changed
+                    if vertical:
+                        lines, first, second = rowConflicts, blankRow, newBlank // size
+                        firstConflicts, secondConflicts = self.row_conflicts(board, first), self.row_conflicts(board, second)
+                    else:
+                        lines, first, second = columnConflicts, blankColumn, newBlank % size
+                        firstConflicts, secondConflicts = self.column_conflicts(board, first), self.column_conflicts(board, second)
+                    savedLines = lines[first], lines[second]
+                    conflicts += firstConflicts + secondConflicts - lines[first] - lines[second]
+                    lines[first], lines[second] = firstConflicts, secondConflicts
+                if useWalkingDistance:
+                    # a vertical move only changes the row states and a horizontal move only the column states
+                    states, groups = (rowStates, tileGroups) if vertical else (columnStates, tileColumnGroups)
+                    savedStates = states[:]
+                    # the blank moving up or left is direction 0, down or right is direction 1
+                    direction = 0 if step < 0 else 1
+                    for i, table in enumerate(tables):
+                        states[i] = table.transitions[(states[i] * 2 + direction) * table.numberOfGroups + groups[i][tile]]
+                path.append(letter)
+                result = search(moved + 1, bound, opposite)
+                if result is True:
+                    return True
+                path.pop()
+                # put the board back as it was
+                board[savedBlank], board[newBlank] = blankTile, tile
+                blank = savedBlank
+                distance -= newDistance - oldDistance
+                conflicts = savedConflicts
+                if useConflicts:
+                    lines[first], lines[second] = savedLines
+                if useWalkingDistance:
+                    states[:] = savedStates
+                if result is None:
+                    return None
+                if result < smallest:
+                    smallest = result
+            return smallest
+
+        bound = get_estimate()
+        while True:
+            result = search(0, bound, None)
+            if result is True:
+                return "".join(path)
+            if result is None:
+                return None
+            bound = result
+
+
+def get_corpus(numberOfTiles, boards, shuffleMoves, seed):
+    """Returns a fixed list of boards to solve. Boards are shuffled by puzzle_pieces the same way as a new game,
+    or if shuffleMoves is given, by that many random moves from the solved board"""
+    random.seed(seed)
+    if not shuffleMoves:
+        return [puzzle_pieces.get_random_list(numberOfTiles, puzzle_pieces.new_seed()) for i in range(boards)]
+    return [[int(piece) for piece in verify.random_game(numberOfTiles, shuffleMoves)[0].split()] for i in range(boards)]
+
+
+def benchmark(numberOfTiles, boards, shuffleMoves, nodeLimit, seed):
+    """Solves the same boards with each heuristic and prints the nodes expanded and time taken"""
+    size = int(numberOfTiles ** 0.5)
+    corpus = get_corpus(numberOfTiles, boards, shuffleMoves, seed)
+    # the first load generates any tables that are missing, the second shows how long loading a saved table takes
+    start = time.perf_counter()
+    get_tables(size)
+    print("Walking distance tables ready in {0:.0f} ms".format((time.perf_counter() - start) * 1000))
+    start = time.perf_counter()
+    tables = get_tables(size)
+    print("Walking distance tables loaded in {0:.1f} ms ({1} states)".format(
+        (time.perf_counter() - start) * 1000, sum(len(table.keys) for table in tables)))
+    results = {}
+    for heuristic in HEURISTICS:
+        solver = Solver(size, heuristic)
+        nodes = []
+        times = []
+        lengths = []
+        for board in corpus:
+            start = time.perf_counter()
+            moves = solver.solve(board, nodeLimit)
+            times.append(time.perf_counter() - start)
+            nodes.append(solver.nodes)
+            lengths.append(None if moves is None else len(moves))
+            # check the solution really solves the board
+            if moves is not None and verify.replay(numberOfTiles, " ".join(str(piece) for piece in board), moves) is not None:
+                sys.exit("{0} found an invalid solution".format(heuristic))
+        results[heuristic] = nodes, times, lengths
+        solved = sum(length is not None for length in lengths)
+        print("{0:>16}: {1}/{2} solved, {3} nodes, {4:.2f}s".format(heuristic, solved, len(corpus), sum(nodes), sum(times)))
+    # every heuristic must find the same number of moves, a longer solution would mean one of them overestimates
+    for i in range(len(corpus)):
+        found = set(results[heuristic][2][i] for heuristic in HEURISTICS) - {None}
+        if len(found) > 1:
+            sys.exit("Heuristics disagree on the fewest moves for board {0}".format(i))
+    # boards given up on are left out so every heuristic is compared on the same boards
+    solvedByAll = [i for i in range(len(corpus)) if all(results[heuristic][2][i] is not None for heuristic in HEURISTICS)]
+    if not solvedByAll:
+        print("No board was solved with every heuristic")
+        return
+    baseNodes = sum(results['manhattan'][0][i] for i in solvedByAll)
+    baseTime = sum(results['manhattan'][1][i] for i in solvedByAll)
+    print("On the {0} boards solved with every heuristic:".format(len(solvedByAll)))
+    for heuristic in HEURISTICS[1:]:
+        nodes = sum(results[heuristic][0][i] for i in solvedByAll)
+        elapsed = sum(results[heuristic][1][i] for i in solvedByAll)
+        print("{0:>16}: {1:.1f}x fewer nodes and {2:.1f}x faster than manhattan".format(heuristic, baseNodes / nodes, baseTime / elapsed))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare how quickly each heuristic finds the fewest moves on a fixed set of boards")
+    parser.add_argument('--tiles', type=int, choices=(9, 16, 25), default=16, help="number of tiles (default: 16)")
+    parser.add_argument('--boards', type=int, default=10, help="number of boards to solve (default: 10)")
+    parser.add_argument('--shuffle-moves', type=int, default=None,
+                        help="shuffle boards with this many random moves instead of a fully random shuffle like a new game")
+    parser.add_argument('--node-limit', type=int, default=None, help="give up on a board after this many nodes")
+    parser.add_argument('--seed', type=int, default=0, help="random seed so runs can be repeated (default: 0)")
+    args = parser.parse_args()
+    benchmark(args.tiles, args.boards, args.shuffle_moves, args.node_limit, args.seed)
@@ -0,0 +1,121 @@
+import argparse
+import gc
+import random
+import statistics
+import sys
+import time
+import tkinter as tk
+import style
+import base
+import memory
+
+# how much each measurement may grow between the start and end of the run before it counts as growing without bound
+ALLOWED_GROWTH = {
+    'widgets': 0,
+    'tcl commands': 0,
+    'tk images': 0,
+    'python objects': 2000,
+    'rss': 5 * 1024 ** 2
+}
+
+
+def count_widgets(widget):
+    """Returns the number of widgets below the given widget, including itself"""
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def take_sample(root):
+    """Returns the current measurements of the resources used by the app"""
+    # collect first so objects waiting to be garbage collected are not counted
+    gc.collect()
+    return {
+        'widgets': count_widgets(root),
+        'tcl commands': len(root.tk.call('info', 'commands')),
+        'tk images': len(root.image_names()),
+        'python objects': len(gc.get_objects()),
+        'rss': memory.get_rss() or 0
+    }
+
+
+def start_game(baseFrame, numberOfTiles):
+    """Starts a new game the same way restart does, without asking for confirmation"""
+    if baseFrame.puzzle is not None:
+        baseFrame.header.stop_timer()
+    baseFrame.play_game(numberOfTiles)
+    # the timer thread updates the header from another thread, which tk only allows while mainloop is running
+    baseFrame.header.stop_timer()
+
+
+def percentile(sortedValues, percent):
+    """Returns the value at the given percentile of a sorted list"""
+    return sortedValues[min(len(sortedValues) - 1, len(sortedValues) * percent // 100)]
+
+
+def stress(numberOfTiles, moves, samples, seed):
+    """Plays the given number of random valid moves on a hidden window through the tiles' own click handler.
+    Returns True if none of the resources measured grew between the middle and the end of the run"""
+    random.seed(seed)
+    root = tk.Tk()
+    # the window is never shown so this can run on a headless machine with a virtual display
+    root.withdraw()
+    style.configuration()
+    baseFrame = base.Frame(root)
+    start_game(baseFrame, numberOfTiles)
+    root.update()
+    latencies = []
+    history = []
+    gamesPlayed = 1
+    sampleInterval = max(1, moves // samples)
+    for move in range(moves):
+        board = baseFrame.puzzle
+        emptyTile = board.emptyTile
+        # only the tiles next to the empty tile, so each move slides exactly one piece
+        neighbours = [tile for tile in board.tiles if abs(tile.row - emptyTile.row) + abs(tile.column - emptyTile.column) == 1]
+        tile = random.choice(neighbours)
+        start = time.perf_counter()
+        tile.tile_selected()
+        # include the time tk takes to redraw the board
+        root.update_idletasks()
+        latencies.append(time.perf_counter() - start)
+        # a random game is sometimes solved, start another one as a player would
+        if board.piecesInPlace == board.numberOfTiles - 1:
+            start_game(baseFrame, numberOfTiles)
+            gamesPlayed += 1
+        # process any other events such as the tiles being resized
+        root.update()
+        if move % sampleInterval == 0:
+            history.append(take_sample(root))
+    history.append(take_sample(root))
+    baseFrame.header.stop_timer()
+    root.destroy()
+
+    latencies.sort()
+    print("{0} moves on {1} tiles over {2} games".format(moves, numberOfTiles, gamesPlayed))
+    print("Move latency: p50 {0:.2f} ms, p95 {1:.2f} ms, p99 {2:.2f} ms, max {3:.2f} ms".format(
+        percentile(latencies, 50) * 1000, percentile(latencies, 95) * 1000, percentile(latencies, 99) * 1000, latencies[-1] * 1000))
+    # the first half of the run is allowed for caches to fill, after that nothing should grow
+    middle = history[len(history) // 2:len(history) // 2 + max(1, len(history) // 10)]
+    end = history[-max(1, len(history) // 10):]
+    passed = True
+    for name, allowed in ALLOWED_GROWTH.items():
+        before = max(sample[name] for sample in middle)
+        after = max(sample[name] for sample in end)
+        growing = after - before > allowed
+        if name == 'rss':
+            values = "{0} -> {1}".format(memory.format_rss(before), memory.format_rss(after))
+        else:
+            values = "{0} -> {1}".format(before, after)
+        print("{0}: {1}{2}".format(name, values, " GROWING" if growing else ""))
+        passed = passed and not growing
+    return passed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Plays random moves on the real game board and checks resource use does not grow")
+    parser.add_argument('--tiles', type=int, choices=(9, 16, 25), default=25, help="number of tiles (default: 25)")
+    parser.add_argument('--moves', type=int, default=5000, help="number of moves to play (default: 5000)")
+    parser.add_argument('--samples', type=int, default=50, help="number of times to measure resource use (default: 50)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed so runs can be repeated (default: 0)")
+    args = parser.parse_args()
+    if not stress(args.tiles, args.moves, args.samples, args.seed):
+        sys.exit("Resource use grew during the run")
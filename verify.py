@@ -0,0 +1,161 @@
+import argparse
+import random
+import shelve
+import time
+from concurrent.futures import ProcessPoolExecutor
+from scoreboard import Scoreboard, DIFFICULTIES
+import puzzle_pieces
+
+# the letter used for each direction a piece can slide in a recorded game
+MOVE_LETTERS = 'LRUD'
+# the move that undoes each move
+OPPOSITE_MOVES = {'L': 'R', 'R': 'L', 'U': 'D', 'D': 'U'}
+# scores are verified in chunks of this many so the work is spread evenly between processes
+CHUNK_SIZE = 500
+
+
+def get_move_table(numberOfTiles):
+    """Returns a dictionary of each move letter to a list giving, for every position of the blank,
+    the position the blank moves to or -1 if the move is not possible from there"""
+    sqrtOfTiles = int(numberOfTiles ** 0.5)
+    table = {letter: [-1] * numberOfTiles for letter in MOVE_LETTERS}
+    for blank in range(numberOfTiles):
+        row, column = divmod(blank, sqrtOfTiles)
+        # a piece sliding left comes from the right of the blank, so the blank moves right
+        if column < sqrtOfTiles - 1:
+            table['L'][blank] = blank + 1
+        if column > 0:
+            table['R'][blank] = blank - 1
+        # a piece sliding up comes from below the blank, so the blank moves down
+        if row < sqrtOfTiles - 1:
+            table['U'][blank] = blank + sqrtOfTiles
+        if row > 0:
+            table['D'][blank] = blank - sqrtOfTiles
+    return table
+
+
+# tables are only built once for each board size
+moveTables = {}
+
+
+def replay(numberOfTiles, start, moves):
+    """Replays the recorded moves from the start position. Start is the piece ids in tile order separated by spaces
+    and moves is a string of move letters. Returns None if every move is legal and the puzzle ends solved, otherwise the reason it failed"""
+    try:
+        board = [int(piece) for piece in start.split()]
+    except ValueError:
+        return "start position is not a list of numbers"
+    if sorted(board) != list(range(numberOfTiles)):
+        return "start position is not an arrangement of {0} pieces".format(numberOfTiles)
+    if numberOfTiles not in moveTables:
+        moveTables[numberOfTiles] = get_move_table(numberOfTiles)
+    table = moveTables[numberOfTiles]
+    blank = board.index(numberOfTiles - 1)
+    # only the piece moving into the blank's old position is written, the blank is put back at the end
+    for moveNumber, letter in enumerate(moves):
+        newBlank = table[letter][blank] if letter in table else -2
+        if newBlank < 0:
+            if newBlank == -2:
+                return "move {0} is not a valid move letter".format(moveNumber + 1)
+            return "move {0} ({1}) is not possible".format(moveNumber + 1, letter)
+        board[blank] = board[newBlank]
+        blank = newBlank
+    board[blank] = numberOfTiles - 1
+    if board != list(range(numberOfTiles)):
+        return "puzzle is not solved after the last move"
+    return None
+
+
+def random_game(numberOfTiles, numberOfMoves):
+    """Returns the start position and moves of a game that is solved in the given number of moves.
+    The start position is made by shuffling a solved puzzle and the moves undo the shuffle"""
+    if numberOfTiles not in moveTables:
+        moveTables[numberOfTiles] = get_move_table(numberOfTiles)
+    table = moveTables[numberOfTiles]
+    board = list(range(numberOfTiles))
+    blank = numberOfTiles - 1
+    shuffle = []
+    while len(shuffle) < numberOfMoves:
+        letter = random.choice(MOVE_LETTERS)
+        newBlank = table[letter][blank]
+        if newBlank >= 0:
+            board[blank], board[newBlank] = board[newBlank], board[blank]
+            blank = newBlank
+            shuffle.append(letter)
+    moves = "".join(OPPOSITE_MOVES[letter] for letter in reversed(shuffle))
+    return " ".join(str(piece) for piece in board), moves
+
+
+def verify_score(scoreData):
+    """Rebuilds the start position from the seed saved with a score and replays the recorded game.
+    Returns None if the game is valid and has the number of moves claimed, otherwise the reason it is not valid"""
+    # scores saved before games were recorded only have 6 values and scores saved before seeds were recorded only have 8
+    if len(scoreData) < 9 or scoreData[8] is None:
+        return "no recorded game"
+    moves, numberOfTiles, start, movesPlayed, seed = scoreData[0], scoreData[4], scoreData[6], scoreData[7], scoreData[8]
+    # the values come from clients so their types are checked before they are used
+    # bool is a subclass of int so the types are compared exactly
+    if type(numberOfTiles) is not int or numberOfTiles not in (9, 16, 25):
+        return "invalid number of tiles {0}".format(numberOfTiles)
+    if not isinstance(start, str):
+        return "start position is not text"
+    if not isinstance(movesPlayed, str):
+        return "moves played is not text"
+    if type(seed) is not int or not 0 <= seed < 2 ** puzzle_pieces.SEED_BITS:
+        return "invalid seed {0}".format(seed)
+    # the start position sent with the score is not trusted, it must be the one the seed shuffles to
+    seededStart = " ".join(str(piece) for piece in puzzle_pieces.get_random_list(numberOfTiles, seed))
+    if start != seededStart:
+        return "start position does not match the seed"
+    if seededStart == " ".join(str(piece) for piece in range(numberOfTiles)):
+        return "start position is already solved"
+    if not movesPlayed:
+        return "no moves played"
+    reason = replay(numberOfTiles, seededStart, movesPlayed)
+    if reason is not None:
+        return reason
+    if len(movesPlayed) != moves:
+        return "{0} moves claimed but {1} played".format(moves, len(movesPlayed))
+    return None
+
+
+def verify_chunk(scores):
+    """Verifies a list of scores. Runs in a worker process. Returns a list of reasons, None for each valid score"""
+    return [verify_score(scoreData) for scoreData in scores]
+
+
+def verify_file(filePath, workers=None):
+    """Verifies every score in a scores file across several processes. Prints scores that fail and a summary"""
+    Scoreboard.shelve_setup(filePath)
+    file = shelve.open(filePath, flag='r')
+    scores = [scoreData for difficulty in DIFFICULTIES for scoreData in file[difficulty]]
+    file.close()
+    chunks = [scores[i:i + CHUNK_SIZE] for i in range(0, len(scores), CHUNK_SIZE)]
+    start = time.perf_counter()
+    valid = 0
+    unrecorded = 0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk, reasons in zip(chunks, pool.map(verify_chunk, chunks)):
+            for scoreData, reason in zip(chunk, reasons):
+                if reason is None:
+                    valid += 1
+                elif reason == "no recorded game":
+                    unrecorded += 1
+                else:
+                    failed += 1
+                    print("{0} ({1} tiles, {2} moves): {3}".format(scoreData[3], scoreData[4], scoreData[0], reason))
+    elapsed = time.perf_counter() - start
+    movesReplayed = sum(len(scoreData[7]) for scoreData in scores if len(scoreData) >= 9 and scoreData[8] is not None)
+    print("{0} valid, {1} failed, {2} without a recorded game".format(valid, failed, unrecorded))
+    print("Replayed {0} moves in {1:.2f}s ({2:.0f} moves/s)".format(movesReplayed, elapsed, movesReplayed / elapsed if elapsed else 0))
+    return failed == 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Verify scores by replaying the recorded games")
+    parser.add_argument('--file', default="scores.dat", help="scores file (default: scores.dat)")
+    parser.add_argument('--workers', type=int, default=None, help="number of processes to use (default: number of CPUs)")
+    args = parser.parse_args()
+    if not verify_file(args.file, args.workers):
+        raise SystemExit("Some scores failed verification")